@@ -0,0 +1,91 @@
+from typing import Dict, Tuple
+
+import pandas as pd
+
+from sepump import COLUMN_DEFINITIONS_PATH, CsvSource, SePump
+from settings import INGEST_CHUNK_SIZE
+
+# Columns of the per exercise series, one row per exercise session.
+EXERCISE_SERIES_COLUMNS = [
+    "exercise", "date", "total_volume", "total_reps", "mean_weight", "mean_reps",
+    "max_weight", "max_reps", "max_volume", "max_e1rm", "max_e1rm_brzycki"
+]
+
+
+def summarize_workouts(workouts: pd.DataFrame) -> Dict[str, float]:
+    """Aggregates metrics across workouts.
+
+    Args:
+        workouts (pd.DataFrame): Workout rollup as built by
+            SePump.rollup_workouts.
+
+    Returns:
+        Dict[str, float]: Number of workouts, sets and reps, total volume and
+        minutes trained.
+    """
+    return {
+        "workouts": len(workouts),
+        "sets": int(workouts["sets"].sum()),
+        "reps": float(workouts["reps"].sum()),
+        "volume": float(workouts["volume"].sum()),
+        "minutes": float(workouts["duration"].fillna(0).sum())
+    }
+
+
+def summarize_user(sepump: SePump) -> Dict:
+    """Aggregates metrics across all workouts of a user.
+
+    Args:
+        sepump (SePump): SePump with cleaned data and aggregate tables.
+
+    Returns:
+        Dict: Metrics of summarize_workouts, the dialect of the export, the
+        number of exercises and the dates of the first and last workout.
+    """
+    summary = {"dialect": sepump.dialect, **summarize_workouts(sepump.workout_rollup)}
+    summary["exercises"] = int(sepump.data[sepump.columns["EXERCISE_NAME"]].nunique())
+    summary["first_workout"] = sepump.data.index[0].date().isoformat() if len(sepump.data) else None
+    summary["last_workout"] = sepump.data.index[-1].date().isoformat() if len(sepump.data) else None
+    return summary
+
+
+def exercise_series(sepump: SePump) -> pd.DataFrame:
+    """Returns the metrics of every exercise per session.
+
+    Args:
+        sepump (SePump): SePump with cleaned data and aggregate tables.
+
+    Returns:
+        pd.DataFrame: EXERCISE_SERIES_COLUMNS sorted by exercise and date.
+    """
+    series = sepump.exercise_sessions[EXERCISE_SERIES_COLUMNS].reset_index(drop=True)
+    series["exercise"] = series["exercise"].astype("str")
+    return series
+
+
+def analyze_export(
+    csv: CsvSource,
+    column_definitions_path: str = COLUMN_DEFINITIONS_PATH,
+    chunksize: int = INGEST_CHUNK_SIZE
+) -> Tuple[Dict, pd.DataFrame, int]:
+    """Cleans an export and computes its statistics without streamlit.
+
+    Args:
+        csv (CsvSource): Path to or uploaded csv file.
+        column_definitions_path (str): Path to json file with column name
+            definitions.
+        chunksize (int): Number of csv rows read at once.
+
+    Raises:
+        Exception: Raised if the csv is not supported.
+
+    Returns:
+        Tuple[Dict, pd.DataFrame, int]: (See summarize_user, See
+        exercise_series, Number of cleaned rows)
+    """
+    sepump = SePump()
+    sepump.stream_data(csv, column_definitions_path, chunksize)
+    # the pair rollup only backs the interactive combined filter
+    sepump.build_exercise_sessions()
+    sepump.build_workout_rollup()
+    return summarize_user(sepump), exercise_series(sepump), len(sepump.data)
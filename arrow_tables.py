@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+from os.path import dirname
+from typing import Dict, Tuple
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+METADATA_KEY = b"liftwise"
+
+
+def write_table(path: str, frame: pd.DataFrame, metadata: Dict) -> None:
+    """Writes a dataframe to an uncompressed Arrow IPC (Feather) file.
+
+    The file is written to a temporary file first, so that concurrent
+    readers never see a partially written table. Being uncompressed, it can
+    be memory mapped by read_table.
+
+    Args:
+        path (str): Target path of the file.
+        frame (pd.DataFrame): Table to write, its index is not kept.
+        metadata (Dict): Json serializable metadata stored with the table.
+    """
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata)})
+    fd, tmp_path = tempfile.mkstemp(dir=dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        # a single batch, columns spanning several batches are copied on reading
+        feather.write_feather(table, tmp_path, compression="uncompressed", chunksize=max(len(table), 1))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_table(path: str) -> Tuple[pd.DataFrame, Dict]:
+    """Maps a file written by write_table into memory.
+
+    Numbers and dates without missing values, category codes and Arrow
+    strings are converted without copying, so these columns keep referencing
+    the mapped file. All processes reading the same file share its pages in
+    the OS page cache instead of holding a copy each. The columns are read
+    only, pandas copies them on write.
+
+    Args:
+        path (str): Path of the file.
+
+    Raises:
+        OSError, KeyError, ValueError, pa.ArrowException: Raised if the file
+        is missing or was not written by write_table.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict]: (Table, Metadata stored with the table)
+    """
+    table = feather.read_table(path, memory_map=True)
+    metadata = json.loads(table.schema.metadata[METADATA_KEY])
+    return table.to_pandas(split_blocks=True), metadata
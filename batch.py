@@ -0,0 +1,125 @@
+"""Computes LiftWise statistics for a directory of exports without streamlit.
+
+Every export is processed in a worker process. The summary metrics of all
+users are written to OUTPUT_DIR/summary.<format>, one row per export, and the
+per exercise series of every user to OUTPUT_DIR/series/<export name>.<format>.
+
+Usage:
+    python batch.py INPUT_DIR OUTPUT_DIR [--format parquet] [--workers 8] [--pattern "*.csv"]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from os.path import basename, join, splitext
+from typing import Dict, List
+
+import pandas as pd
+
+from analytics import analyze_export
+from sepump import COLUMN_DEFINITIONS_PATH
+
+OUTPUT_FORMATS = ("parquet", "json")
+
+
+def write_table(table: pd.DataFrame, path: str, output_format: str) -> None:
+    """Writes a table as parquet or as json records.
+
+    Args:
+        table (pd.DataFrame): Table to write.
+        path (str): Path without extension.
+        output_format (str): One of OUTPUT_FORMATS.
+    """
+    if output_format == "parquet":
+        table.to_parquet(path + ".parquet", index=False)
+    else:
+        table.to_json(path + ".json", orient="records", date_format="iso", indent=1)
+
+
+def process_export(path: str, output_dir: str, output_format: str, column_definitions_path: str) -> Dict:
+    """Analyzes a single export and writes its exercise series.
+
+    Args:
+        path (str): Path to the csv file.
+        output_dir (str): Directory the results are written to.
+        output_format (str): One of OUTPUT_FORMATS.
+        column_definitions_path (str): Path to json file with column name
+            definitions.
+
+    Returns:
+        Dict: Summary metrics of the export with its name, number of cleaned
+        rows and error message (None if it was processed).
+    """
+    user = splitext(basename(path))[0]
+    try:
+        summary, series, rows = analyze_export(path, column_definitions_path)
+    except Exception as error:
+        return {"user": user, "rows": 0, "error": f"{type(error).__name__}: {error}"}
+    write_table(series, join(output_dir, "series", user), output_format)
+    return {"user": user, "rows": rows, "error": None, **summary}
+
+
+def run_batch(
+    paths: List[str],
+    output_dir: str,
+    output_format: str = "parquet",
+    workers: int = os.cpu_count() or 1,
+    column_definitions_path: str = COLUMN_DEFINITIONS_PATH
+) -> pd.DataFrame:
+    """Analyzes exports in parallel and writes their results.
+
+    Args:
+        paths (List[str]): Paths to the csv files.
+        output_dir (str): Directory the results are written to.
+        output_format (str): One of OUTPUT_FORMATS.
+        workers (int): Number of worker processes, exports are processed in
+            this process if 1.
+        column_definitions_path (str): Path to json file with column name
+            definitions.
+
+    Returns:
+        pd.DataFrame: Summary of every export, see process_export.
+    """
+    os.makedirs(join(output_dir, "series"), exist_ok=True)
+    process = partial(
+        process_export,
+        output_dir=output_dir,
+        output_format=output_format,
+        column_definitions_path=column_definitions_path
+    )
+    if workers == 1:
+        summaries = list(map(process, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # hand out several exports at once, most of them are small
+            summaries = list(executor.map(process, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    summary = pd.DataFrame(summaries)
+    write_table(summary, join(output_dir, "summary"), output_format)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input_dir", help="Directory of csv exports.")
+    parser.add_argument("output_dir", help="Directory the results are written to.")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="parquet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pattern", default="*.csv", help="Glob pattern of the exports in input_dir.")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(join(args.input_dir, args.pattern)))
+    start = time.perf_counter()
+    summary = run_batch(paths, args.output_dir, args.format, args.workers)
+    elapsed = time.perf_counter() - start
+
+    failed = summary[summary["error"].notna()] if len(summary) else summary
+    for _, row in failed.iterrows():
+        print(f"{row['user']}: {row['error']}", file=sys.stderr)
+    rows = int(summary["rows"].sum()) if len(summary) else 0
+    print(
+        f"{len(paths) - len(failed):,} of {len(paths):,} exports, {rows:,} rows in {elapsed:.2f} s "
+        f"({len(paths) / elapsed:,.1f} files/s, {rows / elapsed:,.0f} rows/s)"
+    )
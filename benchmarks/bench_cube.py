@@ -0,0 +1,66 @@
+"""Compares filtering by exercise and workout routine from the time cube with
+aggregating the matching workouts per day.
+
+"per day" selects the matching rows of the pair rollup and sums them per
+date, as the combined filter did before the time cube. "cube" calls
+update_filtered_data, which takes totals and chart buckets from the cube.
+Both are timed for the last month, the last year and the whole history.
+
+Usage:
+    python benchmarks/bench_cube.py [--rows 100000 400000] [--repeat 5]
+"""
+import argparse
+import copy
+import datetime as dt
+import os
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from analytics import summarize_workouts  # noqa: E402
+from common import best_of, write_hevy_export  # noqa: E402
+from sepump import COLUMN_DEFINITIONS_PATH, SePump  # noqa: E402
+
+
+def per_day(sepump: SePump, exercise: str) -> None:
+    first, last = sepump.data.index[0], sepump.data.index[-1]
+    pairs = sepump.pair_rollup.loc[first:last]
+    pairs = pairs[pairs["exercise"] == exercise]
+    summarize_workouts(pairs)
+    pairs.groupby("date").agg(total_volume=("volume", "sum"), total_reps=("reps", "sum"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 400_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, "export.csv")
+            write_hevy_export(path, rows)
+            sepump = SePump()
+            sepump.stream_data(path, COLUMN_DEFINITIONS_PATH)
+            start = time.perf_counter()
+            sepump.build_aggregates()
+            aggregates = time.perf_counter() - start
+            start = time.perf_counter()
+            sepump.build_time_cube()
+            print(f"{rows:>9,} rows: aggregates {aggregates:.3f} s, of which time cube {time.perf_counter() - start:.3f} s")
+
+            end = sepump.data.index[-1].date()
+            exercise = sepump.data[sepump.columns["EXERCISE_NAME"]].iloc[0]
+            for name, days in [("month", 30), ("year", 365), ("all", None)]:
+                filtered = copy.copy(sepump)
+                filtered.update_date_range(sepump.data.index[0].date() if days is None else end - dt.timedelta(days=days), end)
+                timings = {
+                    "per day": best_of(args.repeat, lambda: per_day(filtered, exercise)),
+                    "cube": best_of(args.repeat, lambda: filtered.update_filtered_data(exercise, None))
+                }
+                print(
+                    f"{'':>9} {name:>6} ({filtered.filtered_granularity:>5}): "
+                    + " ".join(f"{key} {seconds * 1000:7.2f} ms" for key, seconds in timings.items())
+                )
@@ -0,0 +1,67 @@
+"""Measures the cold start cost of importing the statlift entry point and the
+modules it imports once a file arrives, with python -X importtime.
+
+Every import runs in a fresh interpreter. "landing" imports statlift as the
+upload prompt needs it, "after upload" additionally imports the modules
+statlift imports once a file arrives. Times are the best of all repeats,
+the heaviest modules and the heavy dependencies loaded are listed for the
+last repeat.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 5] [--top 5]
+"""
+import argparse
+import re
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+ROOT = dirname(dirname(abspath(__file__)))
+# Imports of the upload prompt and of the page after a file arrived.
+STAGES = {
+    "landing": ["statlift"],
+    "after upload": ["statlift", "altair", "pandas", "analytics", "instrumentation", "pipeline", "session_state_handler"]
+}
+# Dependencies that should not be imported for the upload prompt.
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "altair", "sepump", "pipeline")
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_time(modules: list) -> tuple:
+    """Imports modules in a fresh interpreter.
+
+    Returns:
+        tuple: (Seconds of all top-level imports, Cumulative microseconds per
+        module, Names of all imported modules)
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-W", "ignore", "-X", "importtime", "-c", "; ".join(f"import {name}" for name in modules)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stderr
+    cumulative, total = {}, 0
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match is None:
+            continue
+        microseconds, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        cumulative[name] = microseconds
+        if not indent:
+            total += microseconds
+    return total / 1e6, cumulative, set(cumulative)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for stage, modules in STAGES.items():
+        runs = [import_time(modules) for _ in range(args.repeat)]
+        seconds = min(run[0] for run in runs)
+        _, cumulative, imported = runs[-1]
+        heavy = [name for name in HEAVY_MODULES if name in imported]
+        print(f"{stage:>12}: {seconds:6.3f} s, heavy modules: {', '.join(heavy) or 'none'}")
+        top_level = {name: value for name, value in cumulative.items() if "." not in name}
+        for name, value in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"{'':>14}{name:<24} {value / 1e6:6.3f} s")
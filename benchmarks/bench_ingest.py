@@ -0,0 +1,45 @@
+"""Compares the legacy sniffing python-engine csv reader with SePump.load_data.
+
+Usage:
+    python benchmarks/bench_ingest.py [--rows 500000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from os.path import abspath, dirname
+
+import pandas as pd
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from common import best_of, write_hevy_export  # noqa: E402
+from sepump import SePump  # noqa: E402
+
+
+def legacy_load(path: str) -> pd.DataFrame:
+    return pd.read_csv(path, sep=None, engine="python")
+
+
+def fast_load(path: str) -> pd.DataFrame:
+    sepump = SePump()
+    sepump.load_data(path)
+    return sepump.data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "workouts.csv")
+        write_hevy_export(path, args.rows)
+        size = os.path.getsize(path) / 2**20
+        legacy = best_of(args.repeat, lambda: legacy_load(path))
+        fast = best_of(args.repeat, lambda: fast_load(path))
+
+    print(f"rows: {args.rows:,} ({size:.1f} MiB)")
+    print(f"legacy python engine: {legacy:.3f} s")
+    print(f"SePump.load_data:     {fast:.3f} s")
+    print(f"speedup:              {legacy / fast:.1f}x")
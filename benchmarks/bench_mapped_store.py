@@ -0,0 +1,97 @@
+"""Measures the time and private memory of server processes opening the same
+export, with and without the memory mapped workout cache.
+
+Every process runs on its own, like the workers of a horizontally scaled
+deployment. "ingest" streams, cleans and aggregates the export itself, as
+every process did without a shared cache. "mapped" opens the entry another
+process stored in the workout cache. "heap" is the growth of the process'
+anonymous memory while opening the export, "mapped files" that of its
+resident file pages, which all processes share through the OS page cache
+(/proc/self/smaps_rollup).
+
+Usage:
+    python benchmarks/bench_mapped_store.py [--rows 100000 400000] [--processes 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from common import write_hevy_export  # noqa: E402
+
+
+def memory() -> dict:
+    """Returns the anonymous and file backed resident bytes of the current
+    process."""
+    with open("/proc/self/smaps_rollup") as f:
+        fields = dict(line.split(":", 1) for line in f.read().splitlines()[1:])
+    kilobytes = {name: int(value.split()[0]) for name, value in fields.items()}
+    return {"heap": kilobytes["Anonymous"] * 1024, "files": (kilobytes["Rss"] - kilobytes["Anonymous"]) * 1024}
+
+
+def measure(mode: str, path: str, cache_dir: str) -> dict:
+    """Opens the export in the current process and returns the seconds taken
+    and the resident memory it added."""
+    from sepump import SePump
+    from workout_cache import WorkoutCache
+
+    cache = WorkoutCache(cache_dir)
+    key = WorkoutCache.key(open(path, "rb").read())
+    before = memory()
+    start = time.perf_counter()
+    if mode == "mapped":
+        sepump = cache.get(key)
+    else:
+        sepump = SePump()
+        sepump.stream_data(path)
+        sepump.build_aggregates()
+    seconds = time.perf_counter() - start
+    # touch every table, as serving the page does
+    sepump.summarize_buckets()
+    sepump.select_records()
+    after = memory()
+    return {"seconds": seconds, **{name: after[name] - before[name] for name in after}}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 400_000])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--measure", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(*args.measure)))
+        sys.exit(0)
+
+    from sepump import SePump  # noqa: E402
+    from workout_cache import WorkoutCache  # noqa: E402
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"hevy_{rows}.csv")
+            write_hevy_export(path, rows)
+            # the first process to receive the export stores it
+            sepump = SePump()
+            sepump.stream_data(path)
+            sepump.build_aggregates()
+            cache_dir = os.path.join(tmp, "cache")
+            WorkoutCache(cache_dir).put(WorkoutCache.key(open(path, "rb").read()), sepump)
+            for mode in ("ingest", "mapped"):
+                results = [
+                    json.loads(subprocess.run(
+                        [sys.executable, abspath(__file__), "--measure", mode, path, cache_dir],
+                        capture_output=True, text=True, check=True
+                    ).stdout.splitlines()[-1])
+                    for _ in range(args.processes)
+                ]
+                print(
+                    f"{rows:>9,} rows {mode:>7}: {min(result['seconds'] for result in results):7.3f} s per process, "
+                    f"heap {max(result['heap'] for result in results) / 2**20:7.1f} MiB, "
+                    f"mapped files {max(result['files'] for result in results) / 2**20:7.1f} MiB"
+                )
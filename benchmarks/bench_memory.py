@@ -0,0 +1,58 @@
+"""Measures the memory held per session by the cleaned workout data.
+
+Compares the compact representation produced by SePump.clean_data with the
+previous object-dtype representation (string names, string workout ids and
+datetime.date objects).
+
+Usage:
+    python benchmarks/bench_memory.py [--rows 500000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from os.path import abspath, dirname
+
+import pandas as pd
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from common import write_hevy_export  # noqa: E402
+from sepump import SePump  # noqa: E402
+
+
+def legacy_representation(data: pd.DataFrame, columns: dict) -> pd.DataFrame:
+    """Converts cleaned data back into the previous object-dtype layout."""
+    legacy = data.copy()
+    for key in ("WORKOUT_NAME", "EXERCISE_NAME"):
+        legacy[columns[key]] = legacy[columns[key]].astype(str).astype(object)
+    legacy["workout_uid"] = (
+        legacy[columns["WORKOUT_NAME"]]
+        + legacy[columns["DATE"]].astype(str)
+        + legacy[columns["WORKOUT_DURATION"]].astype(str)
+    ).astype(object)
+    legacy[columns["DATE"]] = legacy[columns["DATE"]].dt.date
+    return legacy
+
+
+def deep_size(data: pd.DataFrame) -> int:
+    return int(data.memory_usage(deep=True).sum())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "workouts.csv")
+        write_hevy_export(path, args.rows)
+        sepump = SePump()
+        sepump.load_data(path)
+        sepump.clean_data()
+
+    compact = deep_size(sepump.data)
+    legacy = deep_size(legacy_representation(sepump.data, sepump.columns))
+    print(f"rows: {len(sepump.data):,}")
+    print(f"object representation:  {legacy / 2**20:8.1f} MiB")
+    print(f"compact representation: {compact / 2**20:8.1f} MiB")
+    print(f"reduction:              {legacy / compact:8.1f}x")
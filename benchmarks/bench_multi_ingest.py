@@ -0,0 +1,54 @@
+"""Compares streaming several exports of different dialects one after another
+with streaming them at once into a merged SePump.
+
+"largest" and "sum" are the times of streaming the largest file alone and
+all files one after another. "merged" streams and merges all files with
+SePump.stream_files, once per number of worker threads. Parallel streaming
+needs several CPUs; the number available is printed first.
+
+Usage:
+    python benchmarks/bench_multi_ingest.py [--rows 100000] [--dialects HEVY_KG HEVY_LBS ENG_IOS GER_ANDROID] [--workers 1 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from common import best_of  # noqa: E402
+from generate_exports import write_export  # noqa: E402
+from sepump import SePump  # noqa: E402
+
+
+def stream_file(path: str) -> None:
+    SePump().stream_data(path)
+
+
+def stream_files(paths, workers: int) -> SePump:
+    sepump = SePump()
+    sepump.stream_files(paths, workers=workers)
+    return sepump
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dialects", nargs="+", default=["HEVY_KG", "HEVY_LBS", "ENG_IOS", "GER_ANDROID"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for dialect in args.dialects:
+            paths.append(os.path.join(tmp, f"{dialect.lower()}.csv"))
+            write_export(paths[-1], dialect, args.rows)
+        singles = [best_of(args.repeat, lambda: stream_file(path)) for path in paths]
+        print(f"{len(paths)} files of {args.rows:,} rows: largest {max(singles):7.3f} s sum {sum(singles):7.3f} s")
+        for workers in args.workers:
+            seconds = best_of(args.repeat, lambda: stream_files(paths, workers))
+            print(f"{'':>25} merged with {workers} workers {seconds:7.3f} s")
+        merged = stream_files(paths, max(args.workers))
+        print(f"{'':>25} {len(merged.data):,} rows of {merged.data['workout_uid'].nunique():,} workouts after deduplication")
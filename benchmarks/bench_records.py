@@ -0,0 +1,68 @@
+"""Compares the personal record board with looking up every exercise on its own.
+
+"per exercise" selects every exercise with update_exercise_data and takes
+its running maxima, as the exercise section does for one exercise at a time.
+"board" selects the records of all exercises at once from the table built
+by build_records. "build" and "update" time building the record table and
+tracking the records of the exercises of one added workout again.
+
+Exercises are split into variants, so that there are hundreds of them.
+
+Usage:
+    python benchmarks/bench_records.py [--rows 100000 400000] [--variants 40] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from os.path import abspath, dirname
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from common import best_of, write_hevy_export  # noqa: E402
+from sepump import COLUMN_DEFINITIONS_PATH, RECORD_COLUMNS, SePump  # noqa: E402
+
+
+def load(path: str, variants: int) -> SePump:
+    sepump = SePump()
+    sepump.stream_data(path, COLUMN_DEFINITIONS_PATH)
+    column = sepump.columns["EXERCISE_NAME"]
+    variant = (sepump.data["workout_uid"] % variants).astype("str")
+    sepump.data[column] = (sepump.data[column].astype("str") + " #" + variant).astype("category")
+    sepump.build_aggregates()
+    return sepump
+
+
+def per_exercise(sepump: SePump) -> None:
+    for exercise in sepump.exercise_sessions["exercise"].cat.categories:
+        sepump.update_exercise_data(exercise)
+        np.maximum.accumulate(sepump.exercise_data[list(RECORD_COLUMNS)].to_numpy(), axis=0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 400_000])
+    parser.add_argument("--variants", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, "export.csv")
+            write_hevy_export(path, rows)
+            sepump = load(path, args.variants)
+            exercises = sepump.exercise_sessions["exercise"].cat.categories
+            last_workout = sepump.data[sepump.data["workout_uid"] == sepump.data["workout_uid"].iloc[-1]]
+            changed = list(pd.unique(last_workout[sepump.columns["EXERCISE_NAME"]].astype("str")))
+            timings = {
+                "per exercise": best_of(args.repeat, lambda: per_exercise(sepump)),
+                "board": best_of(args.repeat, sepump.select_records),
+                "build": best_of(args.repeat, sepump.build_records),
+                "update": best_of(args.repeat, lambda: sepump.update_records(changed))
+            }
+            print(
+                f"{rows:>9,} rows {len(exercises):>5} exercises: "
+                + " ".join(f"{name} {seconds * 1000:8.2f} ms" for name, seconds in timings.items())
+            )
@@ -0,0 +1,64 @@
+"""Measures the memory and time of many sessions opening the same export with
+and without the shared store.
+
+Every session opens the export after the first one cached it on disk, like
+users reopening the page or sharing an export. Memory is the deep memory of
+the distinct cleaned data and aggregate tables held by all sessions.
+
+Usage:
+    python benchmarks/bench_sessions.py [--rows 100000] [--sessions 1 10 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from common import write_hevy_export  # noqa: E402
+from bench_warmup import Upload  # noqa: E402
+from pipeline import build_pipeline  # noqa: E402
+from shared_store import SharedStore, memory_usage  # noqa: E402
+from workout_cache import WorkoutCache  # noqa: E402
+from workout_store import WorkoutStore  # noqa: E402
+
+
+def open_sessions(upload: Upload, tmp: str, sessions: int, shared_store=None):
+    """Opens the export in every session and returns the seconds taken and the
+    bytes held."""
+    workout_cache = WorkoutCache(os.path.join(tmp, "cache"))
+    workout_store = WorkoutStore(os.path.join(tmp, "store"))
+    held = {}
+    start = time.perf_counter()
+    for session in range(sessions):
+        graph = build_pipeline(workout_cache, workout_store, shared_store=shared_store, session_id=str(session))
+        graph.set_param("uploads", [upload], key=id(upload))
+        sepump = graph.get("clean")
+        graph.set_param("start_date", sepump.data.index[0].date())
+        graph.set_param("end_date", sepump.data.index[-1].date())
+        graph.get("date_filter")
+        held[id(sepump)] = sepump
+    seconds = time.perf_counter() - start
+    return seconds, sum(memory_usage(sepump) for sepump in held.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.csv")
+        write_hevy_export(path, args.rows)
+        upload = Upload(path)
+        # fill the disk cache, as every session after the first one finds it
+        open_sessions(upload, tmp, 1)
+        for sessions in args.sessions:
+            for name, shared_store in [("per session", None), ("shared", SharedStore())]:
+                seconds, held = open_sessions(upload, tmp, sessions, shared_store)
+                print(
+                    f"{args.rows:>9,} rows {sessions:>4} sessions {name:>12}: "
+                    f"{seconds:8.3f} s {held / 2**20:9.1f} MiB"
+                )
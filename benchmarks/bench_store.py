@@ -0,0 +1,52 @@
+"""Compares re-uploading an export with a few new workouts against cleaning
+and aggregating it from scratch.
+
+Usage:
+    python benchmarks/bench_store.py [--rows 100000 400000] [--new-rows 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from common import write_hevy_export  # noqa: E402
+from sepump import SePump  # noqa: E402
+from workout_store import WorkoutStore  # noqa: E402
+
+
+def rebuild(path: str) -> SePump:
+    sepump = SePump()
+    sepump.load_data(path)
+    sepump.clean_data()
+    sepump.build_aggregates()
+    return sepump
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 400_000])
+    parser.add_argument("--new-rows", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'history':>10} {'rebuild':>10} {'first':>10} {'new':>10} {'same':>10}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            # the generator is seeded, so the longer export extends the shorter one
+            previous, current = os.path.join(tmp, "previous.csv"), os.path.join(tmp, "current.csv")
+            write_hevy_export(previous, rows)
+            write_hevy_export(current, rows + args.new_rows)
+            store = WorkoutStore(os.path.join(tmp, "store"))
+            first = timed(store.update, previous)
+            new = timed(store.update, current)
+            same = timed(store.update, current)
+            full = timed(rebuild, current)
+        print(f"{rows:>10,} {full:>8.3f} s {first:>8.3f} s {new:>8.3f} s {same:>8.3f} s")
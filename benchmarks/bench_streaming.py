@@ -0,0 +1,70 @@
+"""Measures the peak memory of loading and cleaning an export at once and in
+chunks.
+
+Every measurement runs in a fresh process, and the peak resident set size
+after importing SePump is subtracted, so memory allocated outside of Python's
+allocator (numpy, Arrow backed strings) is accounted for. The peak grows with
+the file when loading at once, and with the much smaller cleaned data when
+streaming.
+
+Usage:
+    python benchmarks/bench_streaming.py [--rows 100000 400000] [--chunksize 50000]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from common import write_hevy_export  # noqa: E402
+from sepump import SePump  # noqa: E402
+
+
+def peak_rss() -> int:
+    """Returns the peak resident set size of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(mode: str, path: str, chunksize: int) -> None:
+    """Loads path and prints (peak memory increase, size of cleaned data)."""
+    baseline = peak_rss()
+    sepump = SePump()
+    if mode == "streaming":
+        sepump.stream_data(path, chunksize=chunksize)
+    else:
+        sepump.load_data(path)
+        sepump.clean_data()
+    print(peak_rss() - baseline, int(sepump.data.memory_usage(deep=True).sum()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 400_000])
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--measure", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure, args.chunksize)
+        sys.exit()
+
+    print(f"{'rows':>10} {'file':>10} {'mode':>10} {'peak':>10} {'cleaned':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"workouts_{rows}.csv")
+            write_hevy_export(path, rows)
+            file_size = os.path.getsize(path)
+            for mode in ("at once", "streaming"):
+                output = subprocess.run(
+                    [sys.executable, __file__, "--measure", mode, path, "--chunksize", str(args.chunksize)],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                peak, cleaned = map(int, output.split())
+                print(
+                    f"{rows:>10,} {file_size / 2**20:>6.1f} MiB {mode:>10} "
+                    f"{peak / 2**20:>6.1f} MiB {cleaned / 2**20:>6.1f} MiB"
+                )
@@ -0,0 +1,83 @@
+"""Compares storing text columns as Arrow strings with storing them as Python
+objects (LIFTWISE_ARROW_STRINGS=1/0).
+
+Every setting runs in its own process, since the dtype is chosen at import.
+"ingest" streams and cleans the export, "aggregates" builds the aggregate
+tables, "handoff" converts the chart data of every exercise to Arrow tables
+as streamlit does before sending charts to the browser. Memory is the deep
+memory of the cleaned data and aggregate tables.
+
+Usage:
+    python benchmarks/bench_text_storage.py [--rows 100000 400000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from common import write_hevy_export  # noqa: E402
+
+
+def measure(path: str, repeat: int) -> dict:
+    """Returns the best times of every step and the memory held, in the
+    current process."""
+    import pyarrow as pa
+
+    from chart_data import prepare_trend_data
+    from sepump import COLUMN_DEFINITIONS_PATH, SePump
+    from shared_store import memory_usage
+
+    timings = {"ingest": [], "aggregates": [], "handoff": []}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sepump = SePump()
+        sepump.stream_data(path, COLUMN_DEFINITIONS_PATH)
+        timings["ingest"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        sepump.build_aggregates()
+        timings["aggregates"].append(time.perf_counter() - start)
+        charts = []
+        for exercise in sepump.exercise_sessions["exercise"].cat.categories:
+            sepump.update_exercise_data(exercise)
+            charts.append(prepare_trend_data(sepump.exercise_data, "max_weight", extra_columns=["notes"]))
+        start = time.perf_counter()
+        for chart in charts:
+            pa.Table.from_pandas(chart)
+        timings["handoff"].append(time.perf_counter() - start)
+    results = {name: min(values) for name, values in timings.items()}
+    results["memory"] = memory_usage(sepump)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 400_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.repeat)))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"hevy_{rows}.csv")
+            write_hevy_export(path, rows)
+            for name, setting in [("objects", "0"), ("arrow", "1")]:
+                output = subprocess.run(
+                    [sys.executable, abspath(__file__), "--measure", path, "--repeat", str(args.repeat)],
+                    env={**os.environ, "LIFTWISE_ARROW_STRINGS": setting},
+                    capture_output=True, text=True, check=True
+                ).stdout
+                results = json.loads(output.splitlines()[-1])
+                print(
+                    f"{rows:>9,} rows {name:>8}: ingest {results['ingest']:7.3f} s "
+                    f"aggregates {results['aggregates']:7.3f} s handoff {results['handoff'] * 1000:8.2f} ms "
+                    f"memory {results['memory'] / 2**20:7.1f} MiB"
+                )
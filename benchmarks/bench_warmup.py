@@ -0,0 +1,85 @@
+"""Measures how long selecting every exercise and workout routine takes with
+and without the background warm-up.
+
+"cold" serves every selection on demand. "warm-up" is the time the thread
+pool needs to prepare all selections, after which "served" is the time of
+serving all of them from memory.
+
+Usage:
+    python benchmarks/bench_warmup.py [--rows 100000 400000] [--threads 1 2 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from common import write_hevy_export  # noqa: E402
+from pipeline import EXERCISE_CHART_COLUMNS, build_pipeline  # noqa: E402
+from warmup import Warmup  # noqa: E402
+from workout_cache import WorkoutCache  # noqa: E402
+from workout_store import WorkoutStore  # noqa: E402
+
+
+class Upload:
+    """Stands in for a streamlit UploadedFile."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.content = f.read()
+
+    def getvalue(self) -> bytes:
+        return self.content
+
+
+def select_all(graph) -> float:
+    """Selects every exercise and workout routine and returns the seconds taken."""
+    exercises, workout_names = graph.get("options")
+    start = time.perf_counter()
+    for exercise in exercises:
+        graph.set_param("exercise", exercise)
+        graph.get("exercise_metrics")
+        graph.get("exercise_charts")
+    for workout_name in workout_names:
+        graph.set_param("workout", workout_name)
+        graph.get("workout_charts")
+    return time.perf_counter() - start
+
+
+def open_graph(upload: Upload, tmp: str, warmup=None):
+    graph = build_pipeline(
+        WorkoutCache(os.path.join(tmp, "cache")), WorkoutStore(os.path.join(tmp, "store")), warmup=warmup
+    )
+    graph.set_param("uploads", [upload], key=id(upload))
+    data = graph.get("clean").data
+    graph.set_param("start_date", data.index[0].date())
+    graph.set_param("end_date", data.index[-1].date())
+    graph.set_param("exercise_chart_columns", EXERCISE_CHART_COLUMNS)
+    return graph
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 400_000])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'threads':>8} {'cold':>10} {'warm-up':>10} {'served':>10}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "workouts.csv")
+            write_hevy_export(path, rows)
+            upload = Upload(path)
+            cold = select_all(open_graph(upload, tmp))
+            for threads in args.threads:
+                with ThreadPoolExecutor(max_workers=threads) as executor:
+                    graph = open_graph(upload, tmp, Warmup(executor))
+                    start = time.perf_counter()
+                    for future in graph.get("warmup").futures.values():
+                        future.result()
+                    warm = time.perf_counter() - start
+                    served = select_all(graph)
+                print(f"{rows:>10,} {threads:>8} {cold:>8.3f} s {warm:>8.3f} s {served:>8.3f} s")
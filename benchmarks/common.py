@@ -0,0 +1,28 @@
+"""Helpers shared by the benchmark scripts."""
+import sys
+import time
+from os.path import abspath, dirname
+from typing import Callable
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from generate_exports import write_export  # noqa: E402
+
+
+def write_hevy_export(path: str, rows: int) -> None:
+    """Writes a synthetic Hevy export (kg) with the given number of set rows.
+
+    Args:
+        path (str): Target path of the csv file.
+        rows (int): Number of set rows.
+    """
+    write_export(path, "HEVY_KG", rows)
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    """Returns the shortest of repeat runs of func in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
@@ -0,0 +1,152 @@
+"""Writes synthetic workout exports in every dialect defined in columns.json.
+
+Exports of the same dialect are seeded, so a longer export starts with the
+workouts of a shorter one. Workouts take place every one or two days from
+2018 on for SPAN_DAYS. Longer exports start over at the first day, a minute
+later than the previous pass, so that dates stay realistic and every
+workout keeps a distinct start. Strong exports (ENG/GER, iOS/Android) use the
+delimiter and decimal mark of their locale and "1h 5m" durations, Hevy
+exports use seconds.
+
+Usage:
+    python benchmarks/generate_exports.py OUTPUT_DIR [--rows 1000 100000] [--dialects HEVY_KG ENG_IOS]
+"""
+import argparse
+import csv
+import datetime as dt
+import json
+import os
+import random
+import sys
+from os.path import abspath, dirname, join
+from typing import Dict, List
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from sepump import COLUMN_DEFINITIONS_PATH, FORMAT_DEFAULTS  # noqa: E402
+
+HEVY_HEADER = [
+    "title", "start_time", "end_time", "description", "exercise_title",
+    "superset_id", "exercise_notes", "set_index", "set_type", "weight_kg",
+    "reps", "distance_km", "duration_seconds", "rpe"
+]
+# Column definitions of Strong exports in the order of their header.
+STRONG_KEYS = [
+    "DATE", "WORKOUT_NAME", "WORKOUT_DURATION", "EXERCISE_NAME", "SET_ORDER",
+    "WEIGHT", "WEIGHT_UNIT", "REPS", "RPE", "DISTANCE", "DISANCE_UNIT",
+    "SECONDS", "NOTES", "WORKOUT_NOTES"
+]
+EXERCISES = [
+    "Bench Press (Barbell)", "Squat (Barbell)", "Deadlift (Barbell)",
+    "Pull Up", "Overhead Press (Barbell)", "Lat Pulldown (Cable)",
+    "Bicep Curl (Dumbbell)", "Leg Press", "Romanian Deadlift (Barbell)"
+]
+ROUTINES = ["Push", "Pull", "Legs", "Upper", "Lower"]
+FIRST_START = dt.datetime(2018, 1, 1, 8)
+# Days covered by one pass over the dates (about 40,000 rows). Starts stay
+# distinct for up to 1,440 passes (about 50 million rows).
+SPAN_DAYS = 8 * 365
+KG_TO_LBS = 2.20462
+
+
+def load_dialects(column_definitions_path: str = COLUMN_DEFINITIONS_PATH) -> Dict[str, Dict]:
+    with open(column_definitions_path, encoding="utf8") as f:
+        return json.load(f)
+
+
+def hevy_header(columns: Dict) -> List[str]:
+    """Returns the Hevy header with the weight and distance columns of the
+    dialect."""
+    units = {"weight_kg": columns["WEIGHT"], "distance_km": columns["DISTANCE"]}
+    return [units.get(column, column) for column in HEVY_HEADER]
+
+
+def hevy_row(workout: Dict, exercise: str, set_index: int, weight: float, reps: int, columns: Dict) -> List:
+    if columns["WEIGHT"] == "weight_lbs":
+        weight = round(weight * KG_TO_LBS / 5) * 5
+    start, end = workout["start"], workout["end"]
+    return [
+        workout["routine"], start.strftime("%d %b %Y, %H:%M"),
+        end.strftime("%d %b %Y, %H:%M"), "", exercise, "",
+        "felt good" if set_index == 0 else "", set_index,
+        "normal", weight, reps, "", (end - start).seconds, ""
+    ]
+
+
+def strong_row(workout: Dict, exercise: str, set_index: int, weight: float, reps: int, columns: Dict) -> List:
+    minutes = (workout["end"] - workout["start"]).seconds // 60
+    hours, minutes = divmod(minutes, 60)
+    values = {
+        "DATE": workout["start"].strftime("%Y-%m-%d %H:%M:%S"),
+        "WORKOUT_NAME": workout["routine"],
+        "WORKOUT_DURATION": f"{hours}h {minutes}m" if hours else f"{minutes}m",
+        "EXERCISE_NAME": exercise,
+        "SET_ORDER": set_index + 1,
+        "WEIGHT": str(weight).replace(".", columns.get("DECIMAL", FORMAT_DEFAULTS["DECIMAL"])),
+        "WEIGHT_UNIT": "kg",
+        "REPS": reps,
+        "RPE": "",
+        "DISTANCE": 0,
+        "DISANCE_UNIT": "",
+        "SECONDS": 0,
+        "NOTES": "felt good" if set_index == 0 else "",
+        "WORKOUT_NOTES": ""
+    }
+    return [values[key] for key in STRONG_KEYS if key in columns]
+
+
+def write_export(path: str, dialect: str, rows: int, column_definitions_path: str = COLUMN_DEFINITIONS_PATH) -> None:
+    """Writes a synthetic export with exactly the given number of set rows.
+
+    Args:
+        path (str): Target path of the csv file.
+        dialect (str): Name of a dialect in columns.json.
+        rows (int): Number of set rows.
+        column_definitions_path (str): Path to json file with column name
+            definitions.
+    """
+    columns = load_dialects(column_definitions_path)[dialect]
+    if "START_TIME" in columns:
+        header, make_row, delimiter = hevy_header(columns), hevy_row, ","
+    else:
+        header = [columns[key] for key in STRONG_KEYS if key in columns]
+        make_row = strong_row
+        # decimal commas come with semicolon separated files
+        delimiter = ";" if columns.get("DECIMAL") == "," else ","
+    rnd = random.Random(0)
+    day, lap = 0, 0
+    written = 0
+    with open(path, "w", newline="", encoding="utf8") as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow(header)
+        while written < rows:
+            day += rnd.randint(1, 2)
+            if day > SPAN_DAYS:
+                day, lap = 1, lap + 1
+            start = FIRST_START + dt.timedelta(days=day, minutes=lap)
+            workout = {
+                "start": start,
+                "end": start + dt.timedelta(minutes=rnd.randint(40, 100)),
+                "routine": rnd.choice(ROUTINES)
+            }
+            sets = [(exercise, set_index) for exercise in rnd.sample(EXERCISES, 5) for set_index in range(4)]
+            # the last workout is cut short to write exactly rows sets
+            for exercise, set_index in sets[:rows - written]:
+                weight, reps = rnd.choice([40, 50, 60, 62.5, 80]), rnd.randint(3, 12)
+                writer.writerow(make_row(workout, exercise, set_index, weight, reps, columns))
+                written += 1
+
+
+if __name__ == "__main__":
+    dialects = list(load_dialects())
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output_dir")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--dialects", nargs="+", choices=dialects, default=dialects)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for dialect in args.dialects:
+        for rows in args.rows:
+            path = join(args.output_dir, f"{dialect.lower()}_{rows}.csv")
+            write_export(path, dialect, rows)
+            print(f"{path}: {os.path.getsize(path) / 2**20:.1f} MiB")
@@ -0,0 +1,201 @@
+"""Times and memory-profiles every SePump stage on synthetic exports of all
+dialects and writes the results as json.
+
+Every stage runs on the state left by the previous ones. Times are the best
+of --repeat runs of the whole sequence. Memory is measured in one additional
+run under tracemalloc as the peak of the memory allocated during the stage
+above the memory held before it. This covers numpy arrays and Python objects,
+but not memory allocated by Arrow.
+
+With --compare, the times are compared with a previous result file per
+dialect, size and stage, and the exit code is 1 if any stage got slower than
+--threshold times its previous time.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--rows 1000 100000] [--dialects HEVY_KG ENG_IOS]
+        [--repeat 3] [--output results.json] [--compare previous.json] [--threshold 1.25]
+"""
+import argparse
+import copy
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from os.path import abspath, dirname
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from generate_exports import load_dialects, write_export  # noqa: E402
+from pipeline import EXERCISE_METRICS  # noqa: E402
+from sepump import COLUMN_DEFINITIONS_PATH, SePump  # noqa: E402
+
+
+def load_data(state: Dict) -> None:
+    state["sepump"] = SePump()
+    state["sepump"].load_data(state["path"])
+
+
+def load_column_names(state: Dict) -> None:
+    state["sepump"].load_column_names(COLUMN_DEFINITIONS_PATH)
+
+
+def clean_data(state: Dict) -> None:
+    state["sepump"].clean_data()
+
+
+def build_aggregates(state: Dict) -> None:
+    state["sepump"].build_aggregates()
+
+
+def update_date_range(state: Dict) -> None:
+    # the last year, as a typical range of interest
+    sepump = copy.copy(state["sepump"])
+    end = sepump.data.index[-1].date()
+    sepump.update_date_range(end - dt.timedelta(days=365), end)
+    state["filtered"] = sepump
+
+
+def update_exercise_data(state: Dict) -> None:
+    sepump = state["filtered"]
+    sepump.update_exercise_data(sepump.data[sepump.columns["EXERCISE_NAME"]].iloc[0])
+
+
+def calculate_exercise_metric_and_delta(state: Dict) -> None:
+    for column, aggregation in EXERCISE_METRICS:
+        state["filtered"].calculate_exercise_metric_and_delta(column, aggregation)
+
+
+def update_workout_data(state: Dict) -> None:
+    sepump = state["filtered"]
+    sepump.update_workout_data(sepump.data[sepump.columns["WORKOUT_NAME"]].iloc[0])
+
+
+def update_workout_data_agg(state: Dict) -> None:
+    state["filtered"].update_workout_data_agg()
+
+
+STAGES: List[Callable[[Dict], None]] = [
+    load_data, load_column_names, clean_data, build_aggregates, update_date_range,
+    update_exercise_data, calculate_exercise_metric_and_delta, update_workout_data,
+    update_workout_data_agg
+]
+
+
+def time_stages(path: str, repeat: int) -> Dict[str, float]:
+    """Returns the best time in seconds per stage."""
+    timings = {stage.__name__: [] for stage in STAGES}
+    for _ in range(repeat):
+        state = {"path": path}
+        for stage in STAGES:
+            start = time.perf_counter()
+            stage(state)
+            timings[stage.__name__].append(time.perf_counter() - start)
+    return {name: min(values) for name, values in timings.items()}
+
+
+def profile_stages(path: str) -> Dict[str, int]:
+    """Returns the peak of the memory allocated per stage in bytes."""
+    peaks = {}
+    state = {"path": path}
+    tracemalloc.start()
+    try:
+        for stage in STAGES:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            stage(state)
+            peaks[stage.__name__] = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=dirname(abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": dt.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+
+def run(dialects: List[str], sizes: List[int], repeat: int) -> Dict:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for dialect in dialects:
+            for rows in sizes:
+                path = os.path.join(tmp, f"{dialect.lower()}_{rows}.csv")
+                write_export(path, dialect, rows)
+                timings, peaks = time_stages(path, repeat), profile_stages(path)
+                os.remove(path)
+                for stage in STAGES:
+                    results.append({
+                        "dialect": dialect,
+                        "rows": rows,
+                        "stage": stage.__name__,
+                        "seconds": timings[stage.__name__],
+                        "peak_bytes": peaks[stage.__name__]
+                    })
+                    print(
+                        f"{dialect:>15} {rows:>11,} {stage.__name__:>36} "
+                        f"{timings[stage.__name__] * 1000:>10.2f} ms {peaks[stage.__name__] / 2**20:>8.1f} MiB",
+                        file=sys.stderr
+                    )
+    return {"environment": environment(), "results": results}
+
+
+def compare(current: Dict, previous: Dict, threshold: float) -> List[Tuple[str, int, str, float]]:
+    """Prints the time ratio per stage and returns the stages slower than
+    threshold times their previous time."""
+    key = lambda result: (result["dialect"], result["rows"], result["stage"])  # noqa: E731
+    previous_seconds = {key(result): result["seconds"] for result in previous["results"]}
+    regressions = []
+    for result in current["results"]:
+        if key(result) not in previous_seconds:
+            continue
+        ratio = result["seconds"] / max(previous_seconds[key(result)], 1e-9)
+        flag = " <- slower" if ratio > threshold else ""
+        print(f"{result['dialect']:>15} {result['rows']:>11,} {result['stage']:>36} {ratio:>6.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append(key(result) + (ratio,))
+    return regressions
+
+
+if __name__ == "__main__":
+    dialects = list(load_dialects())
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--dialects", nargs="+", choices=dialects, default=dialects)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Path of the result file, printed if omitted.")
+    parser.add_argument("--compare", help="Previous result file to compare with.")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    results = run(args.dialects, args.rows, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(results, f, indent=1)
+    else:
+        print(json.dumps(results, indent=1))
+    if args.compare:
+        with open(args.compare, encoding="utf8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        sys.exit(1 if regressions else 0)
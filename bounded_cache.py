@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class BoundedCache:
+    """In-memory cache that keeps the most recently used entries.
+
+    Safe to use from several threads, e.g. by sessions sharing a SePump.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        """Initializes an empty cache.
+
+        Args:
+            max_entries (int): Number of entries after which the least
+                recently used ones are dropped.
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the entry for key and marks it as recently used.
+
+        Args:
+            key (Hashable): Key of the entry.
+            default (Any): Returned if there is no entry for key.
+
+        Returns:
+            Any: Cached value or default.
+        """
+        with self.lock:
+            if key not in self.entries:
+                return default
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Adds or replaces an entry and drops the least recently used ones.
+
+        Args:
+            key (Hashable): Key of the entry.
+            value (Any): Value to cache.
+        """
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        with self.lock:
+            self.entries.clear()
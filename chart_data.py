@@ -0,0 +1,162 @@
+import threading
+from typing import Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from bounded_cache import BoundedCache
+from instrumentation import profiled
+from settings import MAX_CHART_POINTS
+
+
+def to_days(dates: pd.Series) -> np.ndarray:
+    """Converts dates to (fractional) days since the epoch.
+
+    Args:
+        dates (pd.Series): Dates as datetime64.
+
+    Returns:
+        np.ndarray: Days since 1970-01-01 as float64.
+    """
+    # seconds, as nanoseconds overflow beyond the year 2262
+    return dates.to_numpy().astype("datetime64[s]").astype(np.int64) / 86_400
+
+
+def fit_trend(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Fits a linear regression of y on x by least squares.
+
+    Args:
+        x (np.ndarray): Explanatory values.
+        y (np.ndarray): Observed values. Non-finite values are ignored.
+
+    Returns:
+        np.ndarray: Fitted values at x, all NaN if less than two finite
+        observations exist.
+    """
+    finite = np.isfinite(x) & np.isfinite(y)
+    if np.count_nonzero(finite) < 2 or np.ptp(x[finite]) == 0:
+        return np.full(len(x), np.nan)
+    slope, intercept = np.polyfit(x[finite], y[finite], deg=1)
+    return slope * x + intercept
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Downsamples a series with the Largest-Triangle-Three-Buckets algorithm.
+
+    Keeps the first and the last point and, for every bucket in between, the
+    point spanning the largest triangle with the previously kept point and
+    the average of the next bucket. This preserves the visual shape of the
+    series far better than picking every n-th point. Points with a missing or
+    infinite y value cannot be drawn and are left out, so that they do not
+    dominate the triangle areas.
+
+    Args:
+        x (np.ndarray): Sorted x values.
+        y (np.ndarray): y values.
+        max_points (int): Number of points to keep (at least 3).
+
+    Returns:
+        np.ndarray: Positions of the kept points in ascending order.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    finite = np.isfinite(y)
+    if not finite.all():
+        positions = np.flatnonzero(finite)
+        return positions[lttb(x[positions], y[positions], max_points)]
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        next_start, next_end = end, max(edges[bucket + 2], end + 1) if bucket + 2 < len(edges) else n
+        next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+@profiled()
+def prepare_trend_data(
+    data: pd.DataFrame,
+    y: str,
+    x: str = "date",
+    extra_columns: Optional[List[str]] = None,
+    max_points: int = MAX_CHART_POINTS
+) -> pd.DataFrame:
+    """Computes the regression line of a series and downsamples the series.
+
+    The regression is fitted on the full series, so downsampling does not
+    change the trend line.
+
+    Args:
+        data (pd.DataFrame): Data with one row per point.
+        y (str): Name of the column to plot.
+        x (str): Name of the date column.
+        extra_columns (Optional[List[str]]): Further columns to keep, e.g.
+            for tooltips.
+        max_points (int): Maximum number of points to keep.
+
+    Returns:
+        pd.DataFrame: Columns x, y, "trend" and extra_columns, sorted by x.
+    """
+    columns = [x, y] + [column for column in extra_columns or [] if column not in (x, y)]
+    series = data[columns].sort_values(by=x, kind="stable").reset_index(drop=True)
+    days = to_days(series[x])
+    values = series[y].to_numpy(dtype=np.float64)
+    series["trend"] = fit_trend(days, values)
+    return series.iloc[lttb(days, values, max_points)].reset_index(drop=True)
+
+
+class TrendChartData:
+    """Per session cache of prepared chart data.
+
+    Safe to use from several threads, so that charts can be prepared in the
+    background (see warmup.Warmup). A chart requested by several threads at 
+    once is prepared only once: lookups hold a lock while preparing, which 
+    is cheap as charts are prepared from already aggregated data.
+    """
+
+    def __init__(self, max_points: int = MAX_CHART_POINTS, max_entries: int = 256):
+        """Initializes an empty cache.
+
+        Args:
+            max_points (int): Maximum number of points per chart.
+            max_entries (int): Number of charts to keep.
+        """
+        self.max_points = max_points
+        self.cache = BoundedCache(max_entries)
+        self.lock = threading.Lock()
+
+    def get(
+        self,
+        key: Hashable,
+        data: pd.DataFrame,
+        y: str,
+        extra_columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Returns prepared chart data, computing it on a cache miss.
+
+        Args:
+            key (Hashable): Identifies data, e.g. (exercise, date range).
+            data (pd.DataFrame): Data with one row per point and a "date"
+                column.
+            y (str): Name of the column to plot.
+            extra_columns (Optional[List[str]]): Further columns to keep.
+
+        Returns:
+            pd.DataFrame: See prepare_trend_data.
+        """
+        cache_key = (key, y)
+        with self.lock:
+            chart_data = self.cache.get(cache_key)
+            if chart_data is None:
+                chart_data = prepare_trend_data(data, y, extra_columns=extra_columns, max_points=self.max_points)
+                self.cache.put(cache_key, chart_data)
+        return chart_data
@@ -0,0 +1,113 @@
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from instrumentation import profiled
+
+
+class ComputeGraph:
+    """Memoized computation graph.
+
+    Parameters are set from the outside (e.g. from widget values). Nodes
+    compute their value from parameters and other nodes and are only
+    recomputed if one of their inputs changed since their last evaluation.
+    """
+
+    def __init__(self):
+        """Initializes an empty graph."""
+        self.params = {}
+        self.nodes = {}
+        self.cache = {}
+        self.hits = Counter()
+        self.misses = Counter()
+        self.__version = 0
+
+    def add_node(self, name: str, func: Callable, inputs: List[str]) -> None:
+        """Adds a node to the graph.
+
+        Args:
+            name (str): Name of the node.
+            func (Callable): Computes the node's value, called with the values
+                of inputs as positional arguments.
+            inputs (List[str]): Names of the parameters and nodes the node
+                depends on.
+        """
+        self.nodes[name] = (profiled(name=f"node:{name}")(func), list(inputs))
+        self.cache.pop(name, None)
+
+    def set_param(self, name: str, value: Any, key: Optional[Hashable] = None) -> None:
+        """Sets the value of a parameter.
+
+        Nodes depending on the parameter are invalidated only if its key
+        changed.
+
+        Args:
+            name (str): Name of the parameter.
+            value (Any): Value passed to depending nodes.
+            key (Optional[Hashable]): Identity of the value. Defaults to the
+                value itself, can be set for values that are expensive or
+                impossible to compare (e.g. uploaded files).
+        """
+        key = value if key is None else key
+        if name in self.params and self.params[name][0] == key:
+            self.params[name] = (key, value, self.params[name][2])
+        else:
+            self.params[name] = (key, value, self.__next_version())
+
+    def get(self, name: str) -> Any:
+        """Returns the value of a parameter or node, recomputing if necessary.
+
+        Args:
+            name (str): Name of the parameter or node.
+
+        Returns:
+            Any: Current value.
+        """
+        return self.__evaluate(name)[0]
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drops the cached value of a node, or of all nodes.
+
+        Args:
+            name (Optional[str]): Name of the node. All nodes are invalidated
+                if None.
+        """
+        if name is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(name, None)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Returns the number of cache hits and misses per node.
+
+        Returns:
+            Dict[str, Dict[str, int]]: {node: {"hits": ..., "misses": ...}}
+        """
+        return {
+            name: {"hits": self.hits[name], "misses": self.misses[name]}
+            for name in self.nodes
+        }
+
+    def __evaluate(self, name: str) -> Tuple[Any, int]:
+        if name in self.params:
+            _, value, version = self.params[name]
+            return value, version
+        if name not in self.nodes:
+            raise KeyError(f"Unknown parameter or node: {name}")
+
+        func, inputs = self.nodes[name]
+        evaluated = [self.__evaluate(input_name) for input_name in inputs]
+        input_versions = tuple(version for _, version in evaluated)
+        cached = self.cache.get(name)
+        if cached is not None and cached[0] == input_versions:
+            self.hits[name] += 1
+            return cached[1], cached[2]
+
+        self.misses[name] += 1
+        value = func(*[value for value, _ in evaluated])
+        version = self.__next_version()
+        self.cache[name] = (input_versions, value, version)
+        return value, version
+
+    def __next_version(self) -> int:
+        self.__version += 1
+        return self.__version
@@ -0,0 +1,174 @@
+import datetime as dt
+import functools
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from settings import PROFILE, PROFILE_LOG
+
+ENABLED = PROFILE in ("1", "memory")
+TRACE_MEMORY = PROFILE == "memory"
+
+# Every record is logged as one json document.
+logger = logging.getLogger("liftwise.profile")
+if ENABLED and PROFILE_LOG:
+    handler = logging.FileHandler(PROFILE_LOG, encoding="utf8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+_local = threading.local()
+
+
+def _rows(value: Any) -> Optional[int]:
+    """Returns the number of rows of a dataframe or of the data of a SePump."""
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    data = getattr(value, "data", None)
+    return len(data) if isinstance(data, pd.DataFrame) else None
+
+
+class _Frame:
+    """Measurement of a single call or section."""
+
+    def __init__(self, name: str, kind: str, rows_in: Optional[int]):
+        self.name = name
+        self.kind = kind
+        self.rows_in = rows_in
+        self.stack = _stack()
+        self.depth = len(self.stack)
+        self.memory = self.peak = 0
+        if TRACE_MEMORY:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.memory = self.peak = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.stack.append(self)
+        self.start = time.perf_counter()
+
+    def end(self, rows_out: Optional[int]) -> Dict:
+        seconds = time.perf_counter() - self.start
+        self.stack.remove(self)
+        allocated = None
+        if TRACE_MEMORY:
+            # nested frames reset the peak, they hand their peak up instead
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            allocated = self.peak - self.memory
+            if self.stack:
+                self.stack[-1].peak = max(self.stack[-1].peak, self.peak)
+        record = {
+            "name": self.name,
+            "kind": self.kind,
+            "seconds": seconds,
+            "rows_in": self.rows_in,
+            "rows_out": rows_out,
+            "allocated_bytes": allocated,
+            "depth": self.depth,
+            "thread": threading.current_thread().name,
+            "timestamp": dt.datetime.now().isoformat(timespec="milliseconds")
+        }
+        records = getattr(_local, "records", None)
+        if records is not None:
+            records.append(record)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(record))
+        return record
+
+
+def _stack() -> List[_Frame]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def profiled(name: Optional[str] = None, output: Optional[str] = None) -> Callable:
+    """Decorator recording the time, rows and allocated bytes of every call.
+
+    Rows in are the rows of the first argument, rows out those of the result
+    or, for methods updating their SePump, of the updated attribute. Returns
+    the function unchanged if profiling is disabled, so that it costs nothing.
+
+    Allocated bytes are the peak traced by tracemalloc, which counts and
+    resets the peak of all threads. They are only exact while no other
+    thread allocates, which is why settings disables the warm-up when
+    profiling memory. Profile one session at a time.
+
+    Args:
+        name (Optional[str]): Name of the records, defaults to the qualified
+            name of the function.
+        output (Optional[str]): Attribute of the first argument holding the
+            output, e.g. "exercise_data".
+
+    Returns:
+        Callable: Decorator.
+    """
+    def decorator(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        record_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            frame = _Frame(record_name, "call", _rows(args[0]) if args else None)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                frame.end(None)
+                raise
+            result_rows = None
+            if output is not None:
+                result_rows = _rows(getattr(args[0], output))
+            elif result is not None:
+                result_rows = _rows(result)
+            elif args:
+                result_rows = _rows(args[0])
+            frame.end(result_rows)
+            return result
+        return wrapper
+    return decorator
+
+
+class Sections:
+    """Records consecutive sections of a script, each ending where the next
+    one starts, without nesting the script in context managers."""
+
+    def __init__(self):
+        self.frame = None
+
+    def start(self, name: str, rows: Any = None) -> None:
+        """Ends the current section and starts the next one.
+
+        Args:
+            name (str): Name of the section.
+            rows (Any): Dataframe or SePump whose rows are recorded as rows in.
+        """
+        if not ENABLED:
+            return
+        self.stop()
+        self.frame = _Frame(name, "section", _rows(rows))
+
+    def stop(self) -> None:
+        """Ends the current section."""
+        if self.frame is not None:
+            self.frame.end(None)
+            self.frame = None
+
+
+def collect() -> Optional[List[Dict]]:
+    """Starts collecting the records of the current thread, e.g. of one
+    streamlit rerun. Records of earlier calls are dropped.
+
+    Returns:
+        Optional[List[Dict]]: List the records are appended to, None if
+        profiling is disabled.
+    """
+    if not ENABLED:
+        return None
+    _local.records = []
+    _local.stack = []
+    return _local.records
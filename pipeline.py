@@ -0,0 +1,412 @@
+import copy
+import datetime as dt
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from chart_data import TrendChartData
+from compute_graph import ComputeGraph
+from sepump import COLUMN_DEFINITIONS_PATH, SePump
+from shared_store import SharedStore
+from warmup import Warmup
+from workout_cache import WorkoutCache
+from workout_store import WorkoutStore
+
+# (column, aggregation) pairs shown as metric tiles for individual exercises.
+EXERCISE_METRICS = [
+    ("date", "len"),
+    ("total_reps", "sum"),
+    ("total_volume", "sum"),
+    ("max_weight", "max"),
+    ("max_reps", "max"),
+    ("max_volume", "max")
+]
+# Columns that can be plotted for individual exercises.
+EXERCISE_CHART_COLUMNS = ("total_volume", "mean_weight", "mean_reps", "max_weight", "max_reps", "max_volume")
+# Columns plotted for workout routines and for the combined filter.
+WORKOUT_CHART_COLUMNS = ("total_volume", "total_reps")
+
+
+def ingest(uploads: List) -> Tuple[str, List]:
+    """Identifies uploaded csv files by their content.
+
+    Files with identical content are only kept once, in the order they were
+    uploaded. Several files are identified by the keys of their contents in
+    this order, as a workout contained in several files is kept from the 
+    first of them (see SePump.stream_files).
+
+    Args:
+        uploads (List[st.runtime.uploaded_file_manager.UploadedFile]): 
+            Uploaded csv files.
+
+    Returns:
+        Tuple[str, List]: (Cache key, Distinct uploaded csv files)
+    """
+    files = {}
+    for upload in uploads:
+        files.setdefault(WorkoutCache.key(upload.getvalue()), upload)
+    keys = list(files)
+    cache_key = keys[0] if len(keys) == 1 else WorkoutCache.key("\0".join(keys).encode())
+    return cache_key, list(files.values())
+
+
+def load_cleaned(
+    cache_key: str,
+    uploads: List,
+    workout_cache: WorkoutCache,
+    workout_store: WorkoutStore,
+    column_definitions_path: str
+) -> SePump:
+    """Loads cleaned data and aggregate tables of an upload, either from the 
+        workout cache, which is shared by all processes, or by merging it 
+        into the user's workout store.
+
+    The workout store keeps the history of a single export, so several 
+    files are streamed and merged (see SePump.stream_files) and only cached.
+
+    Args:
+        cache_key (str): Content hash of the upload, see ingest.
+        uploads (List[st.runtime.uploaded_file_manager.UploadedFile]): 
+            Uploaded csv files.
+        workout_cache (WorkoutCache): Cache of cleaned workout data.
+        workout_store (WorkoutStore): Store of cleaned workout data per user.
+        column_definitions_path (str): Path to json file with column name
+            definitions.
+
+    Raises:
+        Exception: Raised if the csv is not supported.
+
+    Returns:
+        SePump: SePump with cleaned data and aggregate tables.
+    """
+    sepump = workout_cache.get(cache_key)
+    if sepump is None:
+        if len(uploads) == 1:
+            sepump = workout_store.update(uploads[0], column_definitions_path)
+        else:
+            sepump = SePump()
+            sepump.stream_files(uploads, column_definitions_path, workout_store.chunksize)
+            sepump.build_aggregates()
+        workout_cache.put(cache_key, sepump)
+    return sepump
+
+
+def clean(
+    ingested: Tuple[str, List],
+    workout_cache: WorkoutCache,
+    workout_store: WorkoutStore,
+    column_definitions_path: str,
+    shared_store: Optional[SharedStore] = None,
+    session_id: Optional[str] = None
+) -> SePump:
+    """Provides cleaned data and aggregate tables of an upload, shared with 
+        all sessions that uploaded the same csv files.
+
+    Args:
+        ingested (Tuple[str, object]): Result of ingest.
+        workout_cache (WorkoutCache): Cache of cleaned workout data.
+        workout_store (WorkoutStore): Store of cleaned workout data per user.
+        column_definitions_path (str): Path to json file with column name
+            definitions.
+        shared_store (Optional[SharedStore]): Store of data shared by all
+            sessions, loaded for this session only if None.
+        session_id (Optional[str]): Session using the data.
+
+    Raises:
+        Exception: Raised if the csv is not supported.
+
+    Returns:
+        SePump: SePump with cleaned data and aggregate tables, must not be 
+        mutated.
+    """
+    cache_key, uploads = ingested
+    load = partial(load_cleaned, cache_key, uploads, workout_cache, workout_store, column_definitions_path)
+    if shared_store is None:
+        return load()
+    return shared_store.get(cache_key, load, session_id)
+
+
+def select_upload_key(ingested: Tuple[str, List]) -> str:
+    """Returns the cache key identifying the uploaded csv files, so that 
+        cached chart data of a previous upload is never served."""
+    return ingested[0]
+
+
+def filter_dates(sepump: SePump, start_date: dt.date, end_date: dt.date) -> SePump:
+    """Restricts cleaned data to the given date range."""
+    sepump = copy.copy(sepump)
+    sepump.update_date_range(start_date, end_date)
+    return sepump
+
+
+def select_options(sepump: SePump) -> Tuple[List[str], List[str]]:
+    """Returns the exercises and workout routines in the date filtered data."""
+    exercises = list(pd.unique(sepump.data[sepump.columns["EXERCISE_NAME"]]))
+    workout_names = list(pd.unique(sepump.data[sepump.columns["WORKOUT_NAME"]]))
+    return exercises, workout_names
+
+
+def select_record_board(sepump: SePump) -> pd.DataFrame:
+    """Selects the personal records of every exercise as of the end of the
+        date range."""
+    return sepump.select_records()
+
+
+def aggregate_exercise(sepump: SePump, exercise: str, warmup: Optional[Warmup] = None) -> SePump:
+    """Looks up the sessions of a single exercise, unless warm_up did."""
+    if warmup is not None:
+        return warmup.get(sepump, ("exercise", exercise), partial(aggregate_exercise, sepump, exercise))
+    sepump = copy.copy(sepump)
+    sepump.update_exercise_data(exercise)
+    return sepump
+
+
+def calculate_exercise_metrics(sepump: SePump) -> Dict[Tuple[str, str], Tuple[str, str]]:
+    """Calculates the metric tiles of a single exercise."""
+    return sepump.calculate_exercise_metrics(EXERCISE_METRICS)
+
+
+def aggregate_workout(sepump: SePump, workout_name: str, warmup: Optional[Warmup] = None) -> SePump:
+    """Looks up the workouts of a single workout routine, unless warm_up did."""
+    if warmup is not None:
+        return warmup.get(sepump, ("workout", workout_name), partial(aggregate_workout, sepump, workout_name))
+    sepump = copy.copy(sepump)
+    sepump.update_workout_data(workout_name)
+    sepump.update_workout_data_agg()
+    return sepump
+
+
+def filter_combined(sepump: SePump, exercise: Optional[str], workout_name: Optional[str]) -> SePump:
+    """Filters workouts by exercise and workout routine."""
+    sepump = copy.copy(sepump)
+    sepump.update_filtered_data(exercise, workout_name)
+    return sepump
+
+
+def prepare_exercise_charts(
+    sepump: SePump,
+    exercise: str,
+    start_date: dt.date,
+    end_date: dt.date,
+    chart_columns: Tuple[str, ...],
+    upload_key: str,
+    trend_chart_data: TrendChartData
+) -> Dict[str, pd.DataFrame]:
+    """Prepares the trend chart data of a single exercise per plotted column."""
+    key = ("exercise", upload_key, exercise, start_date, end_date)
+    return {
+        column: trend_chart_data.get(key, sepump.exercise_data, column, extra_columns=["notes"])
+        for column in chart_columns
+    }
+
+
+def prepare_workout_charts(
+    sepump: SePump,
+    workout_name: str,
+    start_date: dt.date,
+    end_date: dt.date,
+    upload_key: str,
+    trend_chart_data: TrendChartData
+) -> Dict[str, pd.DataFrame]:
+    """Prepares the trend chart data of a single workout routine."""
+    key = ("workout", upload_key, workout_name, start_date, end_date)
+    return {
+        column: trend_chart_data.get(key, sepump.workout_data_agg, column)
+        for column in WORKOUT_CHART_COLUMNS
+    }
+
+
+def prepare_combined_charts(
+    sepump: SePump,
+    exercise: Optional[str],
+    workout_name: Optional[str],
+    start_date: dt.date,
+    end_date: dt.date,
+    upload_key: str,
+    trend_chart_data: TrendChartData
+) -> Dict[str, pd.DataFrame]:
+    """Prepares the trend chart data of workouts filtered by exercise and 
+        workout routine."""
+    key = ("combined", upload_key, exercise, workout_name, start_date, end_date)
+    return {
+        column: trend_chart_data.get(key, sepump.filtered_data_agg, column)
+        for column in WORKOUT_CHART_COLUMNS
+    }
+
+
+def warm_exercise(
+    sepump: SePump,
+    exercise: str,
+    start_date: dt.date,
+    end_date: dt.date,
+    upload_key: str,
+    trend_chart_data: TrendChartData
+) -> SePump:
+    """Looks up the sessions of a single exercise and prepares all of its 
+        charts."""
+    exercise_sepump = aggregate_exercise(sepump, exercise)
+    prepare_exercise_charts(
+        exercise_sepump, exercise, start_date, end_date, EXERCISE_CHART_COLUMNS, upload_key, trend_chart_data
+    )
+    return exercise_sepump
+
+
+def warm_workout(
+    sepump: SePump,
+    workout_name: str,
+    start_date: dt.date,
+    end_date: dt.date,
+    upload_key: str,
+    trend_chart_data: TrendChartData
+) -> SePump:
+    """Looks up the workouts of a single workout routine and prepares its 
+        charts."""
+    workout_sepump = aggregate_workout(sepump, workout_name)
+    prepare_workout_charts(workout_sepump, workout_name, start_date, end_date, upload_key, trend_chart_data)
+    return workout_sepump
+
+
+def warm_up(
+    sepump: SePump,
+    options: Tuple[List[str], List[str]],
+    start_date: dt.date,
+    end_date: dt.date,
+    upload_key: str,
+    warmup: Warmup,
+    trend_chart_data: TrendChartData
+) -> Warmup:
+    """Starts preparing the aggregates and charts of all exercises and 
+        workout routines in the date range in the background.
+
+    A previous run, e.g. for another upload or date range, is cancelled.
+
+    Args:
+        sepump (SePump): Date filtered SePump.
+        options (Tuple[List[str], List[str]]): Result of select_options.
+        start_date (dt.date): Start of the date range.
+        end_date (dt.date): End of the date range.
+        upload_key (str): Result of select_upload_key.
+        warmup (Warmup): Warm-up of the session.
+        trend_chart_data (TrendChartData): Chart data cache of the session.
+
+    Returns:
+        Warmup: The started warm-up.
+    """
+    exercises, workout_names = options
+    tasks = {}
+    for exercise in exercises:
+        tasks[("exercise", exercise)] = partial(
+            warm_exercise, sepump, exercise, start_date, end_date, upload_key, trend_chart_data
+        )
+    for workout_name in workout_names:
+        tasks[("workout", workout_name)] = partial(
+            warm_workout, sepump, workout_name, start_date, end_date, upload_key, trend_chart_data
+        )
+    warmup.start(sepump, tasks)
+    return warmup
+
+
+def build_pipeline(
+    workout_cache: WorkoutCache,
+    workout_store: WorkoutStore,
+    column_definitions_path: str = COLUMN_DEFINITIONS_PATH,
+    warmup: Optional[Warmup] = None,
+    shared_store: Optional[SharedStore] = None,
+    session_id: Optional[str] = None
+) -> ComputeGraph:
+    """Builds the computation graph behind the LiftWise page.
+
+    Parameters to be set: uploads, start_date, end_date, exercise, 
+    exercise_chart_columns, workout, combined_exercise and combined_workout 
+    (None meaning all).
+
+    Nodes are ingest -> clean -> date_filter, which feeds options, 
+    record_board, exercise_aggregates (-> exercise_metrics, exercise_charts),
+    workout_aggregates (-> workout_charts) and combined_filter (-> 
+    combined_charts). Nodes after clean return shallow copies of their input
+    SePump, so cached values are never mutated, and date_filter slices the
+    cleaned data instead of copying it. Chart data is additionally 
+    cached per upload, selection and date range, so switching back to a 
+    previous selection does not prepare its charts again, while a new upload
+    never receives the charts of the previous one.
+
+    If a warm-up is given, the warmup node (date_filter, options) starts 
+    preparing the aggregates and charts of all exercises and workout 
+    routines in the background. exercise_aggregates and workout_aggregates
+    then take their values from the warm-up and the charts are found in the
+    chart data cache.
+
+    Args:
+        workout_cache (WorkoutCache): Cache of cleaned workout data.
+        workout_store (WorkoutStore): Store of cleaned workout data per user.
+        column_definitions_path (str): Path to json file with column name
+            definitions.
+        warmup (Optional[Warmup]): Warm-up of the session, no values are
+            prepared in the background if None.
+        shared_store (Optional[SharedStore]): Store sharing cleaned data
+            across sessions, every graph holds its own data if None.
+        session_id (Optional[str]): Session the graph belongs to.
+
+    Returns:
+        ComputeGraph: Graph with all nodes added.
+    """
+    graph = ComputeGraph()
+    graph.add_node("ingest", ingest, ["uploads"])
+    graph.add_node(
+        "clean",
+        partial(
+            clean,
+            workout_cache=workout_cache,
+            workout_store=workout_store,
+            column_definitions_path=column_definitions_path,
+            shared_store=shared_store,
+            session_id=session_id
+        ),
+        ["ingest"]
+    )
+    graph.add_node("upload_key", select_upload_key, ["ingest"])
+    graph.add_node("date_filter", filter_dates, ["clean", "start_date", "end_date"])
+    graph.add_node("options", select_options, ["date_filter"])
+    graph.add_node("record_board", select_record_board, ["date_filter"])
+    graph.add_node("exercise_aggregates", partial(aggregate_exercise, warmup=warmup), ["date_filter", "exercise"])
+    graph.add_node("exercise_metrics", calculate_exercise_metrics, ["exercise_aggregates"])
+    graph.add_node("workout_aggregates", partial(aggregate_workout, warmup=warmup), ["date_filter", "workout"])
+    graph.add_node("combined_filter", filter_combined, ["date_filter", "combined_exercise", "combined_workout"])
+
+    trend_chart_data = TrendChartData()
+    if warmup is not None:
+        graph.add_node(
+            "warmup",
+            partial(warm_up, warmup=warmup, trend_chart_data=trend_chart_data),
+            ["date_filter", "options", "start_date", "end_date", "upload_key"]
+        )
+    graph.add_node(
+        "exercise_charts",
+        partial(prepare_exercise_charts, trend_chart_data=trend_chart_data),
+        ["exercise_aggregates", "exercise", "start_date", "end_date", "exercise_chart_columns", "upload_key"]
+    )
+    graph.add_node(
+        "workout_charts",
+        partial(prepare_workout_charts, trend_chart_data=trend_chart_data),
+        ["workout_aggregates", "workout", "start_date", "end_date", "upload_key"]
+    )
+    graph.add_node(
+        "combined_charts",
+        partial(prepare_combined_charts, trend_chart_data=trend_chart_data),
+        ["combined_filter", "combined_exercise", "combined_workout", "start_date", "end_date", "upload_key"]
+    )
+    return graph
+
+
+def release_pipeline(graph: ComputeGraph, warmup: Optional[Warmup] = None) -> None:
+    """Drops all values computed by a session's graph and its warm-up, so
+    that shared data no longer used by the session can be freed.
+
+    Args:
+        graph (ComputeGraph): Graph of the session.
+        warmup (Optional[Warmup]): Warm-up of the session.
+    """
+    if warmup is not None:
+        warmup.cancel()
+    graph.invalidate()
@@ -1,10 +1,327 @@
 import pandas as pd
 import numpy as np
+import csv as csv_module
+import io
 import json
-from typing import Dict, Tuple
-import re
-import streamlit as st
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from os.path import join, dirname
+from typing import IO, Dict, List, Optional, Tuple, Union
 import datetime as dt
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+from instrumentation import profiled
+from settings import ARROW_STRINGS, INGEST_CHUNK_SIZE, INGEST_WORKERS, MAX_CHART_POINTS
+
+COLUMN_DEFINITIONS_PATH = join(dirname(__file__), "columns.json")
+# A csv given as path or as binary file object (e.g. a streamlit UploadedFile).
+CsvSource = Union[str, IO[bytes]]
+
+# Column definitions that are actually read from the csv. Everything else in an
+# export (RPE, supersets, workout notes, ...) is skipped by the parser.
+INGEST_KEYS = (
+    "DATE", "START_TIME", "WORKOUT_NAME", "EXERCISE_NAME", "SET_ORDER",
+    "WEIGHT", "WEIGHT_UNIT", "REPS", "DISTANCE", "WORKOUT_DURATION", "NOTES"
+)
+# Columns that are parsed as plain strings instead of letting pandas infer
+# their type.
+TEXT_KEYS = ("DATE", "START_TIME", "WORKOUT_NAME", "EXERCISE_NAME", "WEIGHT_UNIT", "NOTES")
+# Column definitions kept in the cleaned data.
+CLEANED_KEYS = ("DATE", "WORKOUT_NAME", "EXERCISE_NAME", "WEIGHT", "REPS", "WORKOUT_DURATION", "NOTES")
+# Kilograms per unit, as named by weight columns (e.g. weight_lbs) or by the
+# values of weight unit columns.
+WEIGHT_UNITS = {"kg": 1.0, "lbs": 0.45359237}
+# Dialect whose names of the CLEANED_KEYS and weight unit make up the schema
+# of merged files, whatever dialects they are exported in.
+MERGED_DIALECT = "HEVY_KG"
+# Column definitions that make up the header signature of an export format,
+# the columns cleaning needs. Dialects sharing a signature (e.g. HEVY_LBS and
+# HEVY_LBS_MILES) are told apart by their other columns.
+SIGNATURE_KEYS = (
+    "DATE", "START_TIME", "WORKOUT_NAME", "EXERCISE_NAME", "WEIGHT", "REPS",
+    "WORKOUT_DURATION", "NOTES"
+)
+# Definitions that describe how values are formatted instead of naming a 
+# column, with their defaults for dialects that do not define them.
+FORMAT_DEFAULTS = {"DECIMAL": ".", "DURATION_FORMAT": "seconds"}
+SNIFF_DELIMITERS = ",;\t|"
+SAMPLE_SIZE = 64 * 1024
+# Column holding the workout key of every row, see SePump.hash_workouts.
+WORKOUT_KEY = "workout_key"
+
+
+def _arrow_string_dtype() -> pd.StringDtype:
+    """Returns the Arrow backed string dtype, with NaN as missing value like 
+    the default string dtype of pandas 3 where supported."""
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:  # pandas < 2.3
+        return pd.StringDtype("pyarrow")
+
+
+# Dtype of text columns, see settings.ARROW_STRINGS.
+TEXT_DTYPE = _arrow_string_dtype() if ARROW_STRINGS else object
+
+
+def estimate_one_rep_max(weight: pd.Series, reps: pd.Series, formula: str = "epley") -> pd.Series:
+    """Estimates the one-rep max of sets.
+
+    Epley: weight * (1 + reps / 30). Brzycki: weight * 36 / (37 - reps), 
+    which is only defined below 37 reps, so reps are capped at 36.
+
+    Args:
+        weight (pd.Series): Weight of the sets.
+        reps (pd.Series): Repetitions of the sets.
+        formula (str): One of ONE_REP_MAX_FORMULAS.
+
+    Raises:
+        Exception: If not supported formula is provided.
+
+    Returns:
+        pd.Series: Estimated one-rep max, the weight itself for single reps 
+        and 0 for sets without reps.
+    """
+    if formula == "epley":
+        e1rm = weight * (1 + reps / 30)
+    elif formula == "brzycki":
+        e1rm = weight * 36 / (37 - reps.clip(upper=36))
+    else:
+        raise Exception("Invalid one-rep max formula.")
+    return e1rm.where(reps > 1, weight.where(reps == 1, 0))
+
+
+# Formulas supported by estimate_one_rep_max.
+ONE_REP_MAX_FORMULAS = ("epley", "brzycki")
+# Exercise session columns tracked as personal records, see SePump.build_records.
+RECORD_COLUMNS = ("max_weight", "max_reps", "max_volume", "max_e1rm", "max_e1rm_brzycki")
+# Granularities of the time cube, finest first, see SePump.build_time_cube.
+GRANULARITIES = ("day", "week", "month")
+# Measures of the time cube with the aggregation combining their buckets.
+CUBE_MEASURES = {
+    "workouts": "sum",
+    "sets": "sum",
+    "reps": "sum",
+    "volume": "sum",
+    "duration": "sum",
+    "max_weight": "max"
+}
+# Cleaned data and aggregate tables that are persisted, see SePump.export_tables.
+PERSISTED_TABLES = ("data", "exercise_sessions", "workout_rollup", "pair_rollup", "records") + tuple(
+    f"time_cube_{granularity}" for granularity in GRANULARITIES
+)
+
+
+def _bucket_starts(days: np.ndarray, granularity: str) -> np.ndarray:
+    """Returns the first days of the buckets containing the given days.
+
+    Args:
+        days (np.ndarray): Days as datetime64.
+        granularity (str): One of GRANULARITIES, weeks start on Mondays.
+
+    Returns:
+        np.ndarray: First days of the buckets as datetime64[D].
+    """
+    days = days.astype("datetime64[D]")
+    if granularity == "week":
+        # 1970-01-01, day 0, was a Thursday
+        return days - (days.astype(np.int64) + 3) % 7
+    if granularity == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    return days
+
+
+def _next_bucket_starts(days: np.ndarray, granularity: str) -> np.ndarray:
+    """Returns the first days of the buckets following those containing the
+    given days, see _bucket_starts."""
+    days = days.astype("datetime64[D]")
+    if granularity == "week":
+        return _bucket_starts(days, granularity) + 7
+    if granularity == "month":
+        return (days.astype("datetime64[M]") + 1).astype("datetime64[D]")
+    return days + 1
+
+
+def _unify_categories(values: List[pd.Series]) -> List[pd.Series]:
+    """Recodes categoricals to the sorted union of their categories, so that
+    they can be concatenated without falling back to strings.
+
+    Args:
+        values (List[pd.Series]): Categorical series.
+
+    Returns:
+        List[pd.Series]: Series with identical categories.
+    """
+    categories = values[0].cat.categories
+    for series in values[1:]:
+        categories = categories.union(series.cat.categories)
+    return [
+        series if series.cat.categories.equals(categories) else series.cat.set_categories(categories)
+        for series in values
+    ]
+
+
+def _weight_unit(name: str) -> Optional[str]:
+    """Returns the unit a weight column or unit value is named after, None 
+        if unknown."""
+    return next((unit for unit in WEIGHT_UNITS if str(name).strip().lower().endswith(unit)), None)
+
+
+def _parse_seconds(durations: pd.Series) -> pd.Series:
+    return pd.to_numeric(durations, errors="coerce") / 60
+
+
+def _parse_hours_minutes(durations: pd.Series) -> pd.Series:
+    # exports repeat the duration on every set, so only distinct values are parsed
+    codes, uniques = pd.factorize(durations)
+    parts = pd.Series(uniques, dtype=object).str.extract(
+        r"^\s*(?:(\d+)\s*h)?\s*(?:(\d+)\s*m(?:in)?)?\s*(?:(\d+)\s*s)?\s*$"
+    ).astype(np.float64)
+    minutes = parts[0].fillna(0) * 60 + parts[1].fillna(0) + parts[2].fillna(0) / 60
+    minutes = minutes.where(parts.notna().any(axis=1)).to_numpy()
+    return pd.Series(np.where(codes >= 0, minutes[codes], np.nan), index=durations.index)
+
+
+# Parsers converting workout durations to minutes, per DURATION_FORMAT.
+DURATION_PARSERS = {
+    "seconds": _parse_seconds,
+    "hours_minutes": _parse_hours_minutes
+}
+
+
+def _parse_decimals(values: pd.Series) -> pd.Series:
+    """Converts numbers that the csv parser left as strings, such as decimal 
+    commas in a comma separated file.
+
+    Args:
+        values (pd.Series): Parsed column.
+
+    Returns:
+        pd.Series: Numeric column, missing values are kept.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values
+    return pd.to_numeric(values.astype(object).str.replace(",", ".", regex=False))
+
+
+def _running_len(values: pd.DataFrame) -> np.ndarray:
+    return np.broadcast_to(np.arange(1, len(values) + 1, dtype=np.float64)[:, None], values.shape)
+
+
+def _running_count(values: pd.DataFrame) -> np.ndarray:
+    return np.cumsum(values.notna().to_numpy(), axis=0, dtype=np.float64)
+
+
+def _running_sum(values: pd.DataFrame) -> np.ndarray:
+    return np.nancumsum(values.to_numpy(dtype=np.float64), axis=0)
+
+
+def _running_max(values: pd.DataFrame) -> np.ndarray:
+    return np.fmax.accumulate(values.to_numpy(dtype=np.float64), axis=0)
+
+
+def _running_mean(values: pd.DataFrame) -> np.ndarray:
+    return _running_sum(values) / np.maximum(_running_count(values), 1)
+
+
+# Aggregations of exercise metrics. Each one maps the per session values of 
+# some columns (sorted by date) to the aggregate up to and including each 
+# session, so that the last two rows are the current and the previous value.
+RUNNING_AGGREGATIONS = {
+    "len": _running_len,
+    "count": _running_count,
+    "sum": _running_sum,
+    "max": _running_max,
+    "mean": _running_mean
+}
+# Aggregates over zero sessions. Aggregations without an entry fall back to 
+# the current value, i.e. to a delta of 0.
+EMPTY_AGGREGATIONS = {"len": 0, "count": 0, "sum": 0}
+
+
+class DialectDetector:
+    """Detects the export format (dialect) of a csv from its header line."""
+
+    def __init__(self, column_definitions: Dict):
+        """Builds the lookup from header signature to dialect.
+
+        Args:
+            column_definitions (Dict): Dictionary of column names per dialect, 
+                as defined in columns.json.
+        """
+        self.column_definitions = column_definitions
+        self.signatures = {}
+        for dialect, columns in column_definitions.items():
+            signature = frozenset(columns[key] for key in SIGNATURE_KEYS if key in columns)
+            self.signatures.setdefault(signature, []).append(dialect)
+        # prefer the most specific signature if several dialects match
+        self.ranked_signatures = sorted(self.signatures, key=len, reverse=True)
+
+    def detect(self, header: List[str]) -> str:
+        """Returns the dialect whose signature is contained in the header.
+
+        Of several dialects with that signature, the one defining the most
+        of the other header columns is returned, the first defined on ties.
+
+        Args:
+            header (List[str]): Column names of the csv.
+
+        Raises:
+            Exception: Raised if no dialect matches the header.
+
+        Returns:
+            str: Name of the dialect (e.g. "ENG_IOS" or "HEVY_KG").
+        """
+        header = frozenset(header)
+        for signature in self.ranked_signatures:
+            if signature <= header:
+                return max(self.signatures[signature], key=lambda dialect: len(header & set(
+                    self.column_names(dialect).values()
+                )))
+        raise Exception("Input columns are not supported.")
+
+    def column_names(self, dialect: str) -> Dict:
+        """Returns a copy of the column name mapping of a dialect.
+
+        Args:
+            dialect (str): Name of the dialect.
+
+        Returns:
+            Dict: Mapping of column definitions to column names.
+        """
+        columns = self.column_definitions[dialect]
+        return {key: name for key, name in columns.items() if key not in FORMAT_DEFAULTS}
+
+    def formats(self, dialect: str) -> Dict:
+        """Returns the value formats of a dialect.
+
+        Args:
+            dialect (str): Name of the dialect.
+
+        Returns:
+            Dict: Mapping of the FORMAT_DEFAULTS keys to the formats of the 
+            dialect.
+        """
+        columns = self.column_definitions[dialect]
+        return {key: columns.get(key, default) for key, default in FORMAT_DEFAULTS.items()}
+
+
+@lru_cache(maxsize=None)
+def load_dialect_detector(column_definitions_path: str = COLUMN_DEFINITIONS_PATH) -> DialectDetector:
+    """Builds the dialect detector for a column definitions file once.
+
+    Args:
+        column_definitions_path (str): Path to json file with column name 
+        definitions.
+
+    Returns:
+        DialectDetector: Detector for the defined dialects.
+    """
+    with open(column_definitions_path, encoding='utf8') as f:
+        return DialectDetector(json.load(f))
 
 
 class SePump:
@@ -13,94 +330,509 @@ class SePump:
     def __init__(self):
         """Initializes member dataframes"""
         self.data = None
+        self.exercise_sessions = None
         self.exercise_data = None
-        self.prev_exercise_data = None
         self.workout_data = None
         self.workout_data_agg = None
+        self.workout_rollup = None
+        self.pair_rollup = None
+        self.records = None
+        self.time_cube = None
+        self.time_cube_index = None
+        self.filtered_summary = None
+        self.filtered_granularity = None
+        self.filtered_data_agg = None
+        self.workout_hashes = None
         self.columns = None
+        self.formats = None
+        self.header = None
+        self.dialect = None
+        self.date_format = None
+        self.weight_unit = None
 
-    def load_data(self, csv: st.runtime.uploaded_file_manager.UploadedFile) -> None:
+    @profiled()
+    def load_data(
+        self,
+        csv: CsvSource,
+        column_definitions_path: str = COLUMN_DEFINITIONS_PATH
+    ) -> None:
         """Loads data from csv into dataframe.
 
+        The delimiter is sniffed from a small sample at the beginning of the
+        file, so the whole file can be parsed by the C engine. The export 
+        format is detected from the header line before parsing, and only the 
+        columns required by the detected format are read.
+
         Args:
-            csv (st.runtime.uploaded_file_manager.UploadedFile): Uploaded csv 
-            file.
+            csv (CsvSource): Path to or uploaded csv file.
+            column_definitions_path (str): Path to json file with column name 
+            definitions.
+
+        Raises:
+            Exception: Raised if the header does not match a supported format.
+        """
+        self.data = self.__read_csv(csv, column_definitions_path)
+
+    @profiled()
+    def stream_data(
+        self,
+        csv: CsvSource,
+        column_definitions_path: str = COLUMN_DEFINITIONS_PATH,
+        chunksize: int = INGEST_CHUNK_SIZE,
+        known_workouts: Optional[np.ndarray] = None,
+        date_format: Optional[str] = None
+    ) -> None:
+        """Loads and cleans data from csv chunk by chunk.
+
+        Applies the same rules as load_data followed by clean_data, but only
+        one chunk of raw rows is held in memory at a time. Cleaned chunks are 
+        compact (categoricals, float32), so peak memory is bounded by the 
+        chunk size plus about twice the cleaned data, which is needed while 
+        combining the chunks, instead of growing with the raw file. Duplicate 
+        rows are detected across chunks by their hashes, which costs 8 bytes 
+        per unique row.
+
+        A workout is identified by a key hashed from its name, start and 
+        duration (the values workout_uid is built from). If known_workouts is 
+        given, the rows of these workouts are skipped, the key of every 
+        cleaned row is kept in the WORKOUT_KEY column and the keys and content
+        hashes of all workouts in the csv are stored in workout_hashes.
+
+        The format of the dates is guessed from the first date unless given,
+        and kept in date_format. Rows added to a previously read export 
+        should be read with its format, as their first date alone can be 
+        ambiguous (e.g. "May" is a full and an abbreviated month name).
+
+        Args:
+            csv (CsvSource): Path to or uploaded csv file.
+            column_definitions_path (str): Path to json file with column name 
+            definitions.
+            chunksize (int): Number of raw rows per chunk.
+            known_workouts (Optional[np.ndarray]): Keys of workouts not to 
+            clean.
+            date_format (Optional[str]): Format of the dates, guessed if None.
+
+        Raises:
+            Exception: Raised if the header does not match a supported format.
         """
-        self.data = pd.read_csv(csv, sep=None, engine="python")
+        chunks, keys, hashes = self.__stream_chunks(
+            csv, column_definitions_path, chunksize, known_workouts, date_format
+        )
+        self.data = self.__concat_chunks(chunks)
+        if known_workouts is not None:
+            self.workout_hashes = self.__hash_workouts(keys, hashes)
+
+    @profiled()
+    def stream_files(
+        self,
+        csvs: List[CsvSource],
+        column_definitions_path: str = COLUMN_DEFINITIONS_PATH,
+        chunksize: int = INGEST_CHUNK_SIZE,
+        workers: int = INGEST_WORKERS
+    ) -> None:
+        """Loads, cleans and merges several csv files, e.g. exports of 
+            different devices or app versions.
 
-    def load_column_names(self, column_definitions_path: str) -> None:
-        """Retrieves applicable column names based on given dataframe.
+        The files are streamed in parallel by a pool of worker threads, each
+        file with its own dialect as in stream_data. Their cleaned rows are 
+        mapped onto the column names of MERGED_DIALECT and their weights 
+        converted to its unit (kg). The unit of a file is named by its weight
+        column (Hevy) or its weight unit column (Strong), files naming none 
+        are taken to be in kg. A workout contained in several files (same 
+        name, start and duration in minutes) is only kept from the first of
+        them in the given order. Chunks of all files are combined at once, 
+        so the result is cleaned data like that of a single export.
 
         Args:
+            csvs (List[CsvSource]): Paths to or uploaded csv files.
             column_definitions_path (str): Path to json file with column name 
             definitions.
+            chunksize (int): Number of raw rows per chunk.
+            workers (int): Number of files streamed at once.
+
+        Raises:
+            Exception: Raised if the header of a file does not match a 
+            supported format.
+        """
+        pumps = [SePump() for _ in csvs]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(csvs)))) as executor:
+            files = list(executor.map(
+                lambda pump, csv: pump.__stream_chunks(csv, column_definitions_path, chunksize)[0], pumps, csvs
+            ))
+        detector = load_dialect_detector(column_definitions_path)
+        self.columns, self.formats = detector.column_names(MERGED_DIALECT), detector.formats(MERGED_DIALECT)
+        self.header = None
+        # dates of Hevy exports are cleaned into a Date column, see __clean_chunk
+        self.columns.setdefault("DATE", "Date")
+        self.dialect = "+".join(pd.unique(pd.Series([pump.dialect for pump in pumps])))
+        self.weight_unit = _weight_unit(self.columns["WEIGHT"])
+        seen_workouts = np.empty(0, dtype=np.uint64)
+        chunks = []
+        for pump, file_chunks in zip(pumps, files):
+            names = {pump.columns[key]: self.columns[key] for key in CLEANED_KEYS}
+            factor = WEIGHT_UNITS[pump.weight_unit] / WEIGHT_UNITS[self.weight_unit] if pump.weight_unit else 1.0
+            file_workouts = []
+            for chunk in file_chunks:
+                chunk = chunk.rename(columns=names)
+                workouts = self.__workout_ids(chunk)
+                chunk = chunk[~np.isin(workouts, seen_workouts)]
+                if factor != 1.0:
+                    weights = (chunk[self.columns["WEIGHT"]] * factor).astype(np.single)
+                    chunk = chunk.assign(**{self.columns["WEIGHT"]: weights, "volume": weights * chunk[self.columns["REPS"]]})
+                file_workouts.append(workouts)
+                chunks.append(chunk)
+            file_chunks.clear()
+            seen_workouts = np.union1d(seen_workouts, np.concatenate(file_workouts))
+        self.data = self.__concat_chunks(chunks)
+
+    def __stream_chunks(
+        self,
+        csv: CsvSource,
+        column_definitions_path: str,
+        chunksize: int,
+        known_workouts: Optional[np.ndarray] = None,
+        date_format: Optional[str] = None
+    ) -> Tuple[List[pd.DataFrame], List[np.ndarray], List[np.ndarray]]:
+        """Streams the csv and cleans it chunk by chunk, see stream_data.
+
+        Returns:
+            Tuple[List[pd.DataFrame], List[np.ndarray], List[np.ndarray]]: 
+            (Results of __clean_chunk, workout keys and row hashes per chunk,
+            the latter only if known_workouts is given)
         """
-        with open(column_definitions_path, encoding='utf8') as f:
-            column_definitions = json.load(f)
-        self.columns = self.__infer_column_names(self.data, column_definitions)
+        seen_hashes = np.empty(0, dtype=np.uint64)
+        chunks, keys, hashes = [], [], []
+        weight_unit = None
+        with self.__read_csv(csv, column_definitions_path, chunksize=chunksize) as reader:
+            for chunk in reader:
+                chunk_hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+                unique, seen_hashes = self.__deduplicate(chunk_hashes, seen_hashes)
+                # guess the date format once, like pandas does for the whole file
+                date_format = date_format or self.__guess_date_format(chunk)
+                weight_unit = weight_unit or self.__detect_weight_unit(chunk)
+                chunk = chunk[unique]
+                if known_workouts is not None:
+                    chunk_keys = self.__workout_keys(chunk)
+                    keys.append(chunk_keys)
+                    hashes.append(chunk_hashes[unique])
+                    unknown = ~np.isin(chunk_keys, known_workouts)
+                    chunk = chunk[unknown].assign(**{WORKOUT_KEY: chunk_keys[unknown]})
+                chunks.append(self.__clean_chunk(chunk, date_format))
+        self.date_format, self.weight_unit = date_format, weight_unit
+        return chunks, keys, hashes
+
+    @profiled()
+    def peek_workouts(
+        self,
+        csv: CsvSource,
+        column_definitions_path: str = COLUMN_DEFINITIONS_PATH
+    ) -> pd.DataFrame:
+        """Identifies the workouts at the beginning and at the end of the csv
+            without reading all of it.
 
-    def __infer_column_names(self, data: pd.DataFrame, column_definitions: Dict) -> Dict:
-        """Infers the dataframe's language and returns the corresponging column names.
+        Exports are sorted by date, so the oldest workout of the export is 
+        among them.
 
         Args:
-            data (pd.DataFrame): Pandas dataframe containing workout data.
-            column_definitions (Dict): Dictionary of column names in different 
-                languages. Currently supported: German & English
+            csv (CsvSource): Path to or uploaded csv file.
+            column_definitions_path (str): Path to json file with column name 
+            definitions.
 
         Raises:
-            Exception: Raised if an unsupported language is detected.
+            Exception: Raised if the header does not match a supported format.
 
         Returns:
-            Dict: Applicable mapping of column names.
+            pd.DataFrame: One row per workout with the columns WORKOUT_KEY 
+            (see stream_data) and "start".
+        """
+        head = self.__read_sample(csv)
+        delimiter = self.__detect_format(head, column_definitions_path)
+        tail = self.__read_sample(csv, from_end=True)
+        samples = [head, head.splitlines()[0] + "\n" + tail]
+        workouts = []
+        for sample in samples:
+            try:
+                data = self.__parse(io.StringIO(sample), delimiter)
+            except (pd.errors.ParserError, ValueError):
+                # the tail may start within a quoted field spanning lines
+                continue
+            starts = pd.to_datetime(
+                data[self.__start_column(data)], format=self.__guess_date_format(data), errors="coerce"
+            )
+            workouts.append(pd.DataFrame({WORKOUT_KEY: self.__workout_keys(data), "start": starts.to_numpy()}))
+        return pd.concat(workouts, ignore_index=True).dropna().drop_duplicates(WORKOUT_KEY)
+
+    def __hash_workouts(self, keys: List[np.ndarray], hashes: List[np.ndarray]) -> pd.DataFrame:
+        """Combines the row hashes of every workout into a content hash.
+
+        Args:
+            keys (List[np.ndarray]): Workout keys of the deduplicated rows, 
+            per chunk.
+            hashes (List[np.ndarray]): Row hashes of the same rows.
+
+        Returns:
+            pd.DataFrame: One row per workout with the columns WORKOUT_KEY and
+            "content_hash".
+        """
+        keys, hashes = np.concatenate(keys), np.concatenate(hashes)
+        order = np.argsort(keys, kind="stable")
+        keys, hashes = keys[order], hashes[order]
+        first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype=np.int64)
+        # sum with wrap-around, so that the hash does not depend on the order of the sets
+        return pd.DataFrame({
+            WORKOUT_KEY: keys[first],
+            "content_hash": np.add.reduceat(hashes, first) if len(first) else hashes
+        })
+
+    def __deduplicate(self, hashes: np.ndarray, seen_hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds the rows of a chunk that neither appeared in the chunk nor in
+            previous chunks before.
+
+        Args:
+            hashes (np.ndarray): Row hashes of the chunk.
+            seen_hashes (np.ndarray): Sorted row hashes of previous chunks.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (Mask of the first occurrences, 
+            Sorted row hashes including the chunk)
+        """
+        unique = ~pd.Series(hashes).duplicated().to_numpy()
+        if len(seen_hashes):
+            # seen_hashes is sorted, so lookups only need chunk sized temporaries
+            positions = np.searchsorted(seen_hashes, hashes).clip(max=len(seen_hashes) - 1)
+            unique &= seen_hashes[positions] != hashes
+        new_hashes = np.sort(hashes[unique])
+        return unique, np.insert(seen_hashes, np.searchsorted(seen_hashes, new_hashes), new_hashes)
+
+    def __start_column(self, data: pd.DataFrame) -> str:
+        """Returns the raw column holding the start of the workouts."""
+        return "start_time" if "start_time" in data.columns else self.columns["DATE"]
+
+    def __workout_keys(self, data: pd.DataFrame) -> np.ndarray:
+        """Hashes the name, start and duration of the workout of every raw row.
+
+        Args:
+            data (pd.DataFrame): Raw rows as read from the csv.
+
+        Returns:
+            np.ndarray: uint64 key per row.
+        """
+        return pd.util.hash_pandas_object(
+            data[[self.columns["WORKOUT_NAME"], self.__start_column(data), self.columns["WORKOUT_DURATION"]]],
+            index=False
+        ).to_numpy()
+
+    def __workout_ids(self, data: pd.DataFrame) -> np.ndarray:
+        """Hashes the name, start and duration in whole minutes of the 
+            workout of every cleaned row.
+
+        Unlike workout keys, the ids do not depend on the dialect, so that
+        workouts can be matched across files.
+
+        Args:
+            data (pd.DataFrame): Cleaned rows, see __clean_chunk.
+
+        Returns:
+            np.ndarray: uint64 id per row.
+        """
+        return pd.util.hash_pandas_object(pd.DataFrame({
+            "name": data[self.columns["WORKOUT_NAME"]].astype(object),
+            "start": data["workout_start"].dt.floor("min"),
+            "minutes": data[self.columns["WORKOUT_DURATION"]].round()
+        }), index=False).to_numpy()
+
+    def __read_csv(
+        self,
+        csv: CsvSource,
+        column_definitions_path: str,
+        chunksize: Optional[int] = None
+    ):
+        """Detects the format of the csv and parses the required columns.
+
+        Args:
+            csv (CsvSource): Path to or uploaded csv file.
+            column_definitions_path (str): Path to json file with column name 
+            definitions.
+            chunksize (Optional[int]): Number of rows per chunk, the whole 
+            file is read at once if None.
+
+        Returns:
+            pd.DataFrame or an iterator over chunks if chunksize is given.
+        """
+        delimiter = self.__detect_format(self.__read_sample(csv), column_definitions_path)
+        return self.__parse(csv, delimiter, chunksize)
+
+    def __detect_format(self, sample: str, column_definitions_path: str) -> str:
+        """Detects delimiter, header and column names from the first lines.
+
+        Args:
+            sample (str): First lines of the csv.
+            column_definitions_path (str): Path to json file with column name 
+            definitions.
+
+        Returns:
+            str: Delimiter of the csv.
+        """
+        delimiter = self.__sniff_delimiter(sample)
+        self.header = next(csv_module.reader(sample.splitlines()[:1], delimiter=delimiter), [])
+        self.load_column_names(column_definitions_path)
+        return delimiter
+
+    def __parse(self, csv, delimiter: str, chunksize: Optional[int] = None):
+        """Parses the columns required by the detected format with the C 
+            engine.
+
+        Text columns are parsed as plain Python strings, which is faster to 
+        parse and to hash than pandas' string dtype.
+
+        Args:
+            csv: Uploaded csv file, path or buffer.
+            delimiter (str): Delimiter of the csv.
+            chunksize (Optional[int]): Number of rows per chunk, the whole 
+            file is read at once if None.
+
+        Returns:
+            pd.DataFrame or an iterator over chunks if chunksize is given.
+        """
+        ingest_columns = {self.columns[key] for key in INGEST_KEYS if key in self.columns}
+        text_columns = {self.columns[key] for key in TEXT_KEYS if key in self.columns}
+        # decimal commas cannot be parsed from comma separated files, those 
+        # columns are left as strings and converted by __clean_chunk
+        decimal = self.formats["DECIMAL"] if self.formats["DECIMAL"] != delimiter else "."
+        return pd.read_csv(
+            csv,
+            sep=delimiter,
+            decimal=decimal,
+            engine="c",
+            usecols=[column for column in self.header if column in ingest_columns],
+            dtype={column: object for column in self.header if column in text_columns},
+            chunksize=chunksize
+        )
+
+    def __read_sample(self, csv: CsvSource, from_end: bool = False) -> str:
+        """Reads the first bytes of the csv without consuming it.
+
+        Args:
+            csv (CsvSource): Path to or uploaded csv file.
+            from_end (bool): Reads the last bytes instead.
+
+        Returns:
+            str: Decoded sample, cut after the last complete line. Samples 
+            from the end start after the first line break instead.
+        """
+        if hasattr(csv, "read"):
+            position = csv.tell()
+            if from_end:
+                csv.seek(max(csv.seek(0, os.SEEK_END) - SAMPLE_SIZE, 0))
+            sample = csv.read(SAMPLE_SIZE)
+            csv.seek(position)
+        else:
+            with open(csv, "rb") as f:
+                if from_end:
+                    f.seek(max(f.seek(0, os.SEEK_END) - SAMPLE_SIZE, 0))
+                sample = f.read(SAMPLE_SIZE)
+        if isinstance(sample, bytes):
+            sample = sample.decode("utf-8-sig", errors="ignore")
+        if from_end:
+            sample = sample[sample.index("\n") + 1:] if "\n" in sample else ""
+        elif len(sample) == SAMPLE_SIZE and "\n" in sample:
+            sample = sample[:sample.rindex("\n")]
+        return sample
+
+    def __sniff_delimiter(self, sample: str) -> str:
+        """Detects the delimiter of the csv based on a sample.
+
+        Args:
+            sample (str): First lines of the csv.
+
+        Returns:
+            str: Detected delimiter, falls back to "," if the sample is 
+            ambiguous.
         """
         try:
-            _ = data["Duration"]
-            return column_definitions["ENG_IOS"]
-        except Exception:
-            pass
-        try:
-            _ = data["Workout Duration"]
-            return column_definitions["ENG_ANDROID"]
-        except Exception:
-            pass
-        try:
-            _ = data["Dauer"]
-            return column_definitions["GER_IOS"]
-        except Exception:
-            pass
-        try:
-            _ = data["Workout-Dauer"]
-            return column_definitions["GER_ANDROID"]
-        except Exception:
-            pass
-        try:
-            _ = data["weight_kg"]
-            return column_definitions["HEVY_KG"]
-        except Exception:
-            pass
-        try:
-            _ = data["weight_lbs"]
-            return column_definitions["HEVY_LBS"]
-        except Exception:
-            pass
-        try:
-            _ = data["distance_miles"]
-            return column_definitions["HEVY_LBS_MILES"]
-        except Exception:
-            pass
+            return csv_module.Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS).delimiter
+        except csv_module.Error:
+            return ","
 
-        raise Exception("Input columns are not supported.")
+    @profiled()
+    def load_column_names(self, column_definitions_path: str = COLUMN_DEFINITIONS_PATH) -> None:
+        """Retrieves applicable column names based on the csv header.
+
+        Args:
+            column_definitions_path (str): Path to json file with column name 
+            definitions.
 
+        Raises:
+            Exception: Raised if an unsupported format is detected.
+        """
+        header = self.header if self.header is not None else list(self.data.columns)
+        detector = load_dialect_detector(column_definitions_path)
+        self.dialect = detector.detect(header)
+        self.columns = detector.column_names(self.dialect)
+        self.formats = detector.formats(self.dialect)
+
+    @profiled()
     def clean_data(self) -> None:
-        """Performs initial data cleaning of given workout data."""
-        self.data = self.data.drop_duplicates(keep="first")
+        """Performs initial data cleaning of given workout data.
+
+        Exercise and workout names are stored as categoricals, dates as 
+        datetime64 (normalized to days) and workouts are identified by integer 
+        ids in the "workout_uid" column. Rows are sorted by date and indexed by
+        a DatetimeIndex.
+        """
+        self.data = self.__concat_chunks([self.__clean_chunk(self.data.drop_duplicates(keep="first"))])
 
+    def __guess_date_format(self, data: pd.DataFrame, column: Optional[str] = None) -> Optional[str]:
+        """Guesses the strftime format of the dates from the first date.
+
+        Args:
+            data (pd.DataFrame): Raw rows as read from the csv.
+            column (Optional[str]): Column holding the dates, defaults to the
+            start of the workouts.
+
+        Returns:
+            Optional[str]: Format or None if it cannot be guessed.
+        """
+        dates = data[column or self.__start_column(data)].dropna()
+        return guess_datetime_format(dates.iloc[0]) if len(dates) else None
+
+    def __detect_weight_unit(self, data: pd.DataFrame) -> Optional[str]:
+        """Detects the unit of the weights from the name of the weight column
+            or the first value of the weight unit column.
+
+        Args:
+            data (pd.DataFrame): Raw rows as read from the csv.
+
+        Returns:
+            Optional[str]: Key of WEIGHT_UNITS or None if no unit is named.
+        """
+        unit = _weight_unit(self.columns["WEIGHT"])
+        if unit is None and self.columns.get("WEIGHT_UNIT") in data.columns:
+            units = data[self.columns["WEIGHT_UNIT"]].dropna()
+            unit = _weight_unit(units.iloc[0]) if len(units) else None
+        return unit
+
+    def __clean_chunk(self, data: pd.DataFrame, date_format: Optional[str] = None) -> pd.DataFrame:
+        """Applies the row-wise cleaning rules to a chunk of deduplicated raw
+        rows.
+
+        Args:
+            data (pd.DataFrame): Raw rows as read from the csv.
+            date_format (Optional[str]): Format of the dates, inferred by 
+            pandas if None.
+
+        Returns:
+            pd.DataFrame: Cleaned rows in file order. Names are categoricals 
+            with chunk-local categories and the full start of the workout is 
+            kept in the "workout_start" column. A WORKOUT_KEY column is kept 
+            as is.
+        """
         # Handle date columns for HEVY format
-        if "start_time" in self.data.columns:
-            self.data["Date"] = pd.to_datetime(self.data["start_time"]).dt.date
+        if "start_time" in data.columns:
+            data = data.assign(Date=data["start_time"])
             self.columns["DATE"] = "Date"
 
-        self.data = self.data[[
+        data = data[[
             self.columns["DATE"],
             self.columns["WORKOUT_NAME"],
             self.columns["EXERCISE_NAME"],
@@ -108,48 +840,110 @@ class SePump:
             self.columns["REPS"],
             self.columns["WORKOUT_DURATION"],
             self.columns["NOTES"]
-        ]]
-        self.data.dropna(subset=[self.columns["WEIGHT"], self.columns["REPS"]], how='all', inplace=True)
-        self.data[self.columns["WEIGHT"]] = self.data[self.columns["WEIGHT"]].fillna(0)
-        self.data[self.columns["REPS"]] = self.data[self.columns["REPS"]].fillna(0)
-        # hacky way of dealing with differently formatted decimal numbers, assuming nobody goes beyond 1000 kg
-        self.data[self.columns["WEIGHT"]] = self.data[self.columns["WEIGHT"]].replace(",", ".", regex=True).astype(np.single)
-        self.data[self.columns["REPS"]] = self.data[self.columns["REPS"]].replace(",", ".", regex=True).astype(np.single)
-        self.data["workout_uid"] = (
-            self.data[self.columns["WORKOUT_NAME"]].astype(str)
-            + self.data[self.columns["DATE"]].copy().astype(str)
-            + self.data[self.columns["WORKOUT_DURATION"]].astype(str)
+        ] + [column for column in (WORKOUT_KEY,) if column in data.columns]]
+        data = data.dropna(subset=[self.columns["WEIGHT"], self.columns["REPS"]], how='all')
+        data[self.columns["WEIGHT"]] = _parse_decimals(data[self.columns["WEIGHT"]]).fillna(0).astype(np.single)
+        data[self.columns["REPS"]] = _parse_decimals(data[self.columns["REPS"]]).fillna(0).astype(np.single)
+        # a workout is identified by its name, start and duration
+        try:
+            data["workout_start"] = pd.to_datetime(data[self.columns["DATE"]], format=date_format)
+        except ValueError:
+            # a format guessed from a single ambiguous date, e.g. "%B" for "May"
+            if date_format is None:
+                raise
+            data["workout_start"] = pd.to_datetime(data[self.columns["DATE"]], format="mixed")
+        data[self.columns["DATE"]] = data["workout_start"].dt.normalize()
+        data[self.columns["WORKOUT_NAME"]] = data[self.columns["WORKOUT_NAME"]].astype("category")
+        data[self.columns["EXERCISE_NAME"]] = data[self.columns["EXERCISE_NAME"]].astype("category")
+        data["volume"] = data[self.columns["WEIGHT"]] * data[self.columns["REPS"]]
+        duration_parser = DURATION_PARSERS[self.formats["DURATION_FORMAT"]]
+        data[self.columns["WORKOUT_DURATION"]] = duration_parser(data[self.columns["WORKOUT_DURATION"]])
+        return data
+
+    def __concat_chunks(self, chunks: List[pd.DataFrame]) -> pd.DataFrame:
+        """Combines cleaned chunks into the final data.
+
+        Args:
+            chunks (List[pd.DataFrame]): Results of __clean_chunk in file 
+            order. The list is emptied, so that the chunks can be freed as 
+            soon as they are combined.
+
+        Returns:
+            pd.DataFrame: Cleaned data, see clean_data.
+        """
+        chunks[:] = [chunk for chunk in chunks if len(chunk)] or chunks[:1]
+        # unify categories, otherwise concatenating would fall back to strings
+        for column in (self.columns["WORKOUT_NAME"], self.columns["EXERCISE_NAME"]):
+            for chunk, values in zip(chunks, _unify_categories([chunk[column] for chunk in chunks])):
+                chunk[column] = values
+        data = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+        chunks.clear()
+        # notes are parsed as plain strings, store them like cached data is loaded
+        data[self.columns["NOTES"]] = data[self.columns["NOTES"]].astype(TEXT_DTYPE)
+        data["workout_uid"] = self.__factorize_rows(
+            data,
+            [self.columns["WORKOUT_NAME"], "workout_start", self.columns["WORKOUT_DURATION"]]
         )
-        self.data[self.columns["DATE"]] = pd.to_datetime(self.data[self.columns["DATE"]]).dt.date
-        self.data["volume"] = self.data[self.columns["WEIGHT"]] * self.data[self.columns["REPS"]]
-        # Handle duration for HEVY format
-        self.data[self.columns["WORKOUT_DURATION"]] = self.data[self.columns["WORKOUT_DURATION"]] / 60
+        data = data.drop(columns="workout_start")
+        # keep rows sorted by date, so that date ranges can be sliced by binary search
+        data = data.sort_values(by=self.columns["DATE"], kind="stable")
+        data.index = pd.DatetimeIndex(data[self.columns["DATE"]].values)
+        return data
 
-    def update_date_range(self, start_date: dt.date, end_date: dt.date) -> None:
-        """Updates workout data based on given start and end date.
+    def __factorize_rows(self, data: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        """Assigns the same integer id to rows with equal values in columns.
 
         Args:
-            start_date (dt.date): Date after which workouts are included.
-            end_date (dt.date): Date before which workouts are included.
+            data (pd.DataFrame): Pandas dataframe.
+            columns (List[str]): Columns that make up the key of a row. Missing
+                values are treated as equal to each other.
+
+        Returns:
+            np.ndarray: Ids numbered from 0 in order of first appearance.
         """
-        self.data = self.data[
-            (self.data[self.columns["DATE"]] >= start_date)
-            & (self.data[self.columns["DATE"]] <= end_date)
-        ]
+        codes = np.zeros(len(data), dtype=np.int64)
+        for column in columns:
+            column_codes, uniques = pd.factorize(data[column])
+            codes, _ = pd.factorize(codes * (len(uniques) + 1) + column_codes + 1)
+        return codes.astype(np.int32)
 
-    def update_exercise_data(self, exercise: str) -> None:
-        """Updates single exercise data based on given exercise name.
+    @profiled()
+    def build_aggregates(self) -> None:
+        """Builds the aggregate tables backing the exercise and workout views.
+
+        Has to be called once on cleaned data, before any date range is 
+        applied.
+        """
+        self.build_exercise_sessions()
+        self.build_workout_rollup()
+        self.build_pair_rollup()
+        self.build_records()
+        self.build_time_cube()
+
+    @profiled(output="exercise_sessions")
+    def build_exercise_sessions(self) -> None:
+        """Aggregates the sets of every exercise per session in a single pass.
+
+        The resulting table is indexed by exercise name and sorted by exercise 
+        and date, so that the sessions of one exercise are a contiguous slice.
+        """
+        self.exercise_sessions = self.sort_exercise_sessions(self.aggregate_exercise_sessions(self.data))
+
+    def aggregate_exercise_sessions(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Aggregates the sets of the given workout data per exercise session.
 
         Args:
-            exercise (str): Name of the exercise.
+            data (pd.DataFrame): Cleaned workout data.
+
+        Returns:
+            pd.DataFrame: One row per exercise, workout routine and date, in 
+            order of first appearance.
         """
-        exercise_data = self.data[self.data[self.columns["EXERCISE_NAME"]] == exercise].copy()
-        exercise_data.loc[:, "workout_exercise_uid"] = (
-            exercise_data[self.columns["WORKOUT_NAME"]]
-            + exercise_data[self.columns["EXERCISE_NAME"]]
-            + exercise_data[self.columns["DATE"]].copy().astype(str)
+        session_ids = self.__factorize_rows(
+            data,
+            [self.columns["EXERCISE_NAME"], self.columns["WORKOUT_NAME"], self.columns["DATE"]]
         )
-        self.exercise_data = exercise_data.groupby("workout_exercise_uid").agg(**{
+        sessions = data.groupby(session_ids, sort=False).agg(**{
             "date": (self.columns["DATE"], "max"),
             "exercise": (self.columns["EXERCISE_NAME"], "first"),
             "mean_reps": (self.columns["REPS"], "mean"),
@@ -160,9 +954,517 @@ class SePump:
             "total_reps": (self.columns["REPS"], "sum"),
             "notes": (self.columns["NOTES"], "first")
         })
-        self.exercise_data["mean_weight"] = self.exercise_data["total_volume"] / self.exercise_data["total_reps"]
-        self.prev_exercise_data = self.exercise_data.sort_values(by="date")
-        self.prev_exercise_data = self.prev_exercise_data.iloc[:-1]
+        for column, formula in (("max_e1rm", "epley"), ("max_e1rm_brzycki", "brzycki")):
+            sessions[column] = estimate_one_rep_max(
+                data[self.columns["WEIGHT"]], data[self.columns["REPS"]], formula
+            ).groupby(session_ids, sort=False).max().to_numpy()
+        sessions["mean_weight"] = sessions["total_volume"] / sessions["total_reps"]
+        return sessions
+
+    def sort_exercise_sessions(self, sessions: pd.DataFrame) -> pd.DataFrame:
+        """Sorts exercise sessions by exercise and date and indexes them by 
+            exercise.
+
+        Args:
+            sessions (pd.DataFrame): Result of aggregate_exercise_sessions.
+
+        Returns:
+            pd.DataFrame: Sorted sessions with a CategoricalIndex.
+        """
+        sessions = sessions.sort_values(by=["exercise", "date"], kind="stable")
+        sessions.index = pd.CategoricalIndex(sessions["exercise"].array)
+        return sessions
+
+    @profiled(output="workout_rollup")
+    def build_workout_rollup(self) -> None:
+        """Aggregates the sets of every workout, sorted and indexed by date."""
+        self.workout_rollup = self.rollup_workouts(self.data)
+
+    def rollup_workouts(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Aggregates the sets of the given workout data per workout.
+
+        Args:
+            data (pd.DataFrame): Cleaned workout data, sorted by date.
+
+        Returns:
+            pd.DataFrame: One row per workout with its id, date, routine, 
+            number of sets, total reps, total volume, duration and maximum 
+            weight.
+        """
+        rollup = data.groupby("workout_uid", sort=False).agg(**{
+            "date": (self.columns["DATE"], "max"),
+            "routine": (self.columns["WORKOUT_NAME"], "first"),
+            "sets": (self.columns["REPS"], "size"),
+            "reps": (self.columns["REPS"], "sum"),
+            "volume": ("volume", "sum"),
+            "duration": (self.columns["WORKOUT_DURATION"], "first"),
+            "max_weight": (self.columns["WEIGHT"], "max")
+        }).reset_index()
+        return self.sort_by_date(rollup)
+
+    def sort_by_date(self, table: pd.DataFrame) -> pd.DataFrame:
+        """Sorts an aggregate table by its "date" column and indexes it by 
+            date.
+
+        Args:
+            table (pd.DataFrame): Aggregate table.
+
+        Returns:
+            pd.DataFrame: Sorted table with a DatetimeIndex.
+        """
+        if not table["date"].is_monotonic_increasing:
+            table = table.sort_values(by="date", kind="stable")
+        table.index = pd.DatetimeIndex(table["date"].values)
+        return table
+
+    @profiled(output="pair_rollup")
+    def build_pair_rollup(self) -> None:
+        """Aggregates the sets of every exercise per workout.
+
+        The rollup is sorted and indexed by date and feeds the time cube.
+        """
+        self.pair_rollup = self.rollup_pairs(self.data)
+
+    def rollup_pairs(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Aggregates the sets of the given workout data per workout and 
+            exercise.
+
+        Args:
+            data (pd.DataFrame): Cleaned workout data, sorted by date.
+
+        Returns:
+            pd.DataFrame: One row per workout and exercise, sorted and indexed
+            by date.
+        """
+        pair_ids = self.__factorize_rows(data, ["workout_uid", self.columns["EXERCISE_NAME"]])
+        pairs = data.groupby(pair_ids, sort=False).agg(**{
+            "workout_uid": ("workout_uid", "first"),
+            "date": (self.columns["DATE"], "max"),
+            "exercise": (self.columns["EXERCISE_NAME"], "first"),
+            "routine": (self.columns["WORKOUT_NAME"], "first"),
+            "sets": (self.columns["REPS"], "size"),
+            "reps": (self.columns["REPS"], "sum"),
+            "volume": ("volume", "sum"),
+            "duration": (self.columns["WORKOUT_DURATION"], "first"),
+            "max_weight": (self.columns["WEIGHT"], "max")
+        })
+        return self.sort_by_date(pairs)
+
+    @profiled(output="records")
+    def build_records(self) -> None:
+        """Tracks the personal records of every exercise across its sessions.
+
+        The resulting table has one row per exercise session in the order of
+        exercise_sessions. For every column in RECORD_COLUMNS, it holds the
+        best value up to and including the session and, in "<column>_date",
+        the date that value was set on.
+        """
+        self.records = self.exercise_sessions[["exercise", "date"]].assign(
+            **self.track_records(self.exercise_sessions)
+        )
+
+    def track_records(self, sessions: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Computes running personal records in a single grouped pass.
+
+        Args:
+            sessions (pd.DataFrame): Exercise sessions sorted by exercise and
+            date, e.g. exercise_sessions or a subset of its exercises.
+
+        Returns:
+            Dict[str, np.ndarray]: Record columns, see build_records.
+        """
+        exercises = sessions["exercise"].cat.codes.to_numpy()
+        running = sessions.groupby("exercise", observed=True, sort=False)[list(RECORD_COLUMNS)].cummax().to_numpy()
+        # a record is set where the running best increases or a new exercise 
+        # starts, its date is carried forward to the following sessions
+        improved = np.ones(running.shape, dtype=bool)
+        improved[1:] = running[1:] > running[:-1]
+        improved[1:] |= (exercises[1:] != exercises[:-1])[:, None]
+        positions = np.where(improved, np.arange(len(sessions))[:, None], 0)
+        set_on = sessions["date"].to_numpy()[np.maximum.accumulate(positions, axis=0)]
+        columns = {}
+        for i, column in enumerate(RECORD_COLUMNS):
+            columns[column] = running[:, i]
+            columns[column + "_date"] = set_on[:, i]
+        return columns
+
+    def update_records(self, exercises: List[str]) -> None:
+        """Tracks the records of some exercises again, e.g. after sessions of
+            them were added or removed, and keeps those of all other 
+            exercises.
+
+        Has to be called after exercise_sessions was updated. The sessions of
+        all other exercises are expected to be unchanged, so that they keep 
+        their order.
+
+        Args:
+            exercises (List[str]): Names of the exercises whose sessions 
+                changed.
+        """
+        changed = self.exercise_sessions["exercise"].isin(exercises).to_numpy()
+        kept = ~self.records["exercise"].isin(exercises).to_numpy()
+        tracked = self.track_records(self.exercise_sessions[changed])
+        columns = {}
+        for column, values in tracked.items():
+            merged = np.empty(len(changed), dtype=values.dtype)
+            merged[changed] = values
+            merged[~changed] = self.records[column].to_numpy()[kept]
+            columns[column] = merged
+        self.records = self.exercise_sessions[["exercise", "date"]].assign(**columns)
+
+    @profiled()
+    def select_records(self) -> pd.DataFrame:
+        """Selects the personal records of every exercise as of the last date
+            covered by the current workout data.
+
+        Returns:
+            pd.DataFrame: One row per exercise trained until then, with the 
+            date of its last session and the columns of build_records.
+        """
+        last_date = self.__data_date_span()[1]
+        if last_date is None:
+            return self.records.iloc[:0].reset_index(drop=True)
+        records = self.records[self.records["date"].to_numpy() <= last_date.to_datetime64()]
+        return records[~records["exercise"].duplicated(keep="last").to_numpy()].reset_index(drop=True)
+
+    @profiled()
+    def build_time_cube(self) -> None:
+        """Pre-aggregates the workouts into day, week and month buckets per 
+            exercise and workout routine.
+
+        time_cube maps every granularity to a table with a "date" column 
+        holding the first day of the bucket, "exercise" and "routine" columns
+        (NaN meaning all) and the CUBE_MEASURES. Rows of exercises count the
+        workouts they were trained in. time_cube_index maps (exercise, 
+        routine), (exercise, None), (None, routine) and (None, None) to the 
+        slice of the rows of the key, which are sorted by date.
+        """
+        pairs = self.pair_rollup.assign(workouts=1)
+        workouts = self.workout_rollup.assign(workouts=1)
+        dtypes = {"exercise": pairs["exercise"].dtype, "routine": pairs["routine"].dtype}
+        # category codes, -1 standing for all exercises or routines
+        levels = []
+        for rows, keys in [(pairs, ("exercise", "routine")), (pairs, ("exercise",)), (workouts, ("routine",)), (workouts, ())]:
+            level = {
+                key: rows[key].cat.codes.to_numpy().astype(np.int64) if key in keys else np.full(len(rows), -1)
+                for key in dtypes
+            }
+            level["day"] = rows["date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+            levels.append(pd.DataFrame({**level, **{measure: rows[measure].to_numpy() for measure in CUBE_MEASURES}}))
+        rows = pd.concat(levels, ignore_index=True)
+        rows[["reps", "volume", "duration"]] = rows[["reps", "volume", "duration"]].astype(np.float64)
+        # buckets start up to a month before the first day
+        first_day = rows["day"].min() - 31 if len(rows) else 0
+        span = rows["day"].max() - first_day + 1 if len(rows) else 1
+        routines = len(dtypes["routine"].categories) + 1
+
+        self.time_cube = {}
+        days = None
+        for granularity in GRANULARITIES:
+            # weeks and months are aggregated from the (fewer) days
+            source = rows if days is None else days
+            buckets = _bucket_starts(source["day"].to_numpy().astype("datetime64[D]"), granularity).astype(np.int64)
+            # a single integer key sorts like (exercise, routine, bucket)
+            keys = ((source["exercise"].to_numpy() + 1) * routines + source["routine"].to_numpy() + 1) * span
+            grouped = source.groupby(keys + buckets - first_day, sort=True)
+            cube = pd.concat([
+                grouped[[measure for measure in CUBE_MEASURES if CUBE_MEASURES[measure] == aggregation]].agg(aggregation)
+                for aggregation in ("sum", "max")
+            ], axis=1)
+            keys = cube.index.to_numpy()
+            key_pairs, cube_days = np.divmod(keys, span)
+            cube.insert(0, "day", cube_days + first_day)
+            cube.insert(0, "routine", key_pairs % routines - 1)
+            cube.insert(0, "exercise", key_pairs // routines - 1)
+            cube = cube.reset_index(drop=True)
+            if days is None:
+                days = cube
+            self.time_cube[granularity] = pd.DataFrame({
+                "date": cube["day"].to_numpy().astype("datetime64[D]").astype(self.pair_rollup["date"].dtype),
+                **{name: pd.Categorical.from_codes(cube[name].to_numpy(), dtype=dtype) for name, dtype in dtypes.items()},
+                **{measure: cube[measure].to_numpy() for measure in CUBE_MEASURES}
+            })
+        self.index_time_cube()
+
+    def index_time_cube(self) -> None:
+        """Builds time_cube_index from the time_cube tables, see 
+            build_time_cube."""
+        self.time_cube_index = {}
+        for granularity, cube in self.time_cube.items():
+            codes = {name: cube[name].cat.codes.to_numpy() for name in ("exercise", "routine")}
+            categories = {name: cube[name].cat.categories for name in codes}
+            # the rows of a key are contiguous and sorted by date
+            starts = np.flatnonzero(np.r_[
+                len(cube) > 0,
+                (codes["exercise"][1:] != codes["exercise"][:-1]) | (codes["routine"][1:] != codes["routine"][:-1])
+            ])
+            stops = np.r_[starts[1:], len(cube)]
+            index = {}
+            for start, stop in zip(starts, stops):
+                key = tuple(None if codes[name][start] < 0 else categories[name][codes[name][start]] for name in codes)
+                index[key] = slice(int(start), int(stop))
+            self.time_cube_index[granularity] = index
+
+    def choose_granularity(self, max_buckets: int = MAX_CHART_POINTS) -> str:
+        """Chooses the finest granularity with at most max_buckets buckets in
+            the dates covered by the current workout data.
+
+        Args:
+            max_buckets (int): Maximum number of buckets.
+
+        Returns:
+            str: One of GRANULARITIES, the coarsest one if none fits.
+        """
+        first_date, last_date = self.__data_date_span()
+        if first_date is None:
+            return GRANULARITIES[0]
+        first, last = np.datetime64(first_date.date(), "D"), np.datetime64(last_date.date(), "D")
+        counts = {
+            "day": (last - first).astype(np.int64) + 1,
+            "week": (_bucket_starts(last, "week") - _bucket_starts(first, "week")).astype(np.int64) // 7 + 1,
+            "month": (last.astype("datetime64[M]") - first.astype("datetime64[M]")).astype(np.int64) + 1
+        }
+        for granularity in GRANULARITIES:
+            if counts[granularity] <= max_buckets:
+                return granularity
+        return GRANULARITIES[-1]
+
+    @profiled()
+    def select_buckets(self, exercise: Optional[str], workout_name: Optional[str], granularity: str) -> pd.DataFrame:
+        """Selects the buckets of an exercise and workout routine in the 
+            dates covered by the current workout data.
+
+        Buckets covered completely are taken from the time cube, buckets at 
+        the edges of the date range are aggregated from the days within the 
+        range. The cost therefore depends on the number of buckets, not on 
+        the number of workouts.
+
+        Args:
+            exercise (Optional[str]): Name of the exercise. All exercises are
+                included if None.
+            workout_name (Optional[str]): Name of the workout routine. All 
+                routines are included if None.
+            granularity (str): One of GRANULARITIES.
+
+        Returns:
+            pd.DataFrame: "date" (first day of the bucket) and CUBE_MEASURES, 
+            one row per bucket with workouts, sorted by date.
+        """
+        return pd.DataFrame(self.__select_bucket_arrays(exercise, workout_name, granularity))
+
+    def __select_bucket_arrays(
+        self,
+        exercise: Optional[str],
+        workout_name: Optional[str],
+        granularity: str
+    ) -> Dict[str, np.ndarray]:
+        """Selects buckets like select_buckets, as arrays per column."""
+        def key_columns(granularity: str) -> Dict[str, np.ndarray]:
+            cube = self.time_cube[granularity]
+            rows = self.time_cube_index[granularity].get((exercise, workout_name), slice(0, 0))
+            return {column: cube[column].to_numpy()[rows] for column in ["date"] + list(CUBE_MEASURES)}
+
+        days = key_columns("day")
+        span = self.__data_date_slice(days["date"])
+        days = {column: values[span] for column, values in days.items()}
+        if granularity == "day" or len(days["date"]) == 0:
+            return days
+
+        first, last = days["date"][[0, -1]].astype("datetime64[D]")
+        # buckets from full_start up to full_stop lie completely in the range
+        full_start = first if _bucket_starts(first, granularity) == first else _next_bucket_starts(first, granularity)
+        full_stop = _bucket_starts(last + 1, granularity)
+        buckets = key_columns(granularity)
+        start, stop = buckets["date"].searchsorted([full_start, full_stop])
+        edges = (days["date"] < full_start) | (days["date"] >= full_stop)
+        # days are sorted, so the days of an edge bucket are contiguous
+        edge_buckets = _bucket_starts(days["date"][edges], granularity)
+        offsets = np.flatnonzero(np.r_[True, edge_buckets[1:] != edge_buckets[:-1]]) if len(edge_buckets) else []
+        columns = {"date": np.concatenate([edge_buckets[offsets].astype(days["date"].dtype), buckets["date"][start:stop]])}
+        for measure, aggregation in CUBE_MEASURES.items():
+            reduce = np.add if aggregation == "sum" else np.maximum
+            edge_values = reduce.reduceat(days[measure][edges], offsets) if len(offsets) else days[measure][:0]
+            columns[measure] = np.concatenate([edge_values, buckets[measure][start:stop]])
+        order = np.argsort(columns["date"], kind="stable")
+        return {column: values[order] for column, values in columns.items()}
+
+    def summarize_buckets(self, exercise: Optional[str] = None, workout_name: Optional[str] = None) -> Dict[str, float]:
+        """Aggregates metrics of an exercise and workout routine in the dates
+            covered by the current workout data from monthly buckets.
+
+        Args:
+            exercise (Optional[str]): Name of the exercise. All exercises are
+                included if None.
+            workout_name (Optional[str]): Name of the workout routine. All 
+                routines are included if None.
+
+        Returns:
+            Dict[str, float]: Number of workouts, sets and reps, total volume 
+            and minutes trained, like analytics.summarize_workouts.
+        """
+        buckets = self.__select_bucket_arrays(exercise, workout_name, GRANULARITIES[-1])
+        return {
+            "workouts": int(buckets["workouts"].sum()),
+            "sets": int(buckets["sets"].sum()),
+            "reps": float(buckets["reps"].sum()),
+            "volume": float(buckets["volume"].sum()),
+            "minutes": float(buckets["duration"].sum())
+        }
+
+    def store_text(self) -> None:
+        """Stores the notes of the data and of the exercise sessions as 
+            TEXT_DTYPE, e.g. after loading them from Arrow tables."""
+        self.data[self.columns["NOTES"]] = self.data[self.columns["NOTES"]].astype(TEXT_DTYPE)
+        if self.exercise_sessions is not None:
+            self.exercise_sessions["notes"] = self.exercise_sessions["notes"].astype(TEXT_DTYPE)
+
+    def export_tables(self) -> Dict[str, pd.DataFrame]:
+        """Returns the cleaned data and aggregate tables by their names in 
+            PERSISTED_TABLES, e.g. to store them on disk.
+
+        Has to be called on cleaned data with aggregate tables, before any 
+        date range is applied. Indexes are rebuilt by import_tables.
+        """
+        tables = {
+            "data": self.data,
+            "exercise_sessions": self.exercise_sessions,
+            "workout_rollup": self.workout_rollup,
+            "pair_rollup": self.pair_rollup,
+            "records": self.records
+        }
+        for granularity in GRANULARITIES:
+            tables[f"time_cube_{granularity}"] = self.time_cube[granularity]
+        return tables
+
+    def import_tables(self, tables: Dict[str, pd.DataFrame]) -> None:
+        """Restores the tables returned by export_tables.
+
+        The tables are used as they are, only indexes are rebuilt, so that
+        tables read from memory mapped files keep referencing the mapped 
+        memory. Column names have to be set before.
+
+        Args:
+            tables (Dict[str, pd.DataFrame]): Tables by their names in 
+                PERSISTED_TABLES, sorted as exported.
+        """
+        self.data = tables["data"]
+        self.data.index = pd.DatetimeIndex(self.data[self.columns["DATE"]].values)
+        self.exercise_sessions = tables["exercise_sessions"]
+        self.exercise_sessions.index = pd.CategoricalIndex(self.exercise_sessions["exercise"].array)
+        self.workout_rollup = self.sort_by_date(tables["workout_rollup"])
+        self.pair_rollup = self.sort_by_date(tables["pair_rollup"])
+        self.records = tables["records"]
+        self.records.index = self.exercise_sessions.index
+        self.time_cube = {granularity: tables[f"time_cube_{granularity}"] for granularity in GRANULARITIES}
+        self.index_time_cube()
+        self.store_text()
+
+    @profiled()
+    def merge_workouts(self, new_data: pd.DataFrame, removed_uids: np.ndarray) -> None:
+        """Removes workouts from and adds cleaned workouts to the data and 
+            updates the aggregate tables incrementally.
+
+        Only the days of removed and added workouts are aggregated again, the
+        rows of all other days are kept as they are. Records are only tracked
+        again for the exercises trained on these days. The time cube is built
+        again from the rollups. Has to be called on 
+        cleaned data with aggregate tables, before any date range is applied.
+
+        Args:
+            new_data (pd.DataFrame): Cleaned data of the added workouts, with
+            workout_uid values not used in the data yet.
+            removed_uids (np.ndarray): Ids of the workouts to remove.
+        """
+        removed = self.data["workout_uid"].isin(removed_uids).to_numpy()
+        days = self.data.index[removed].union(new_data.index).unique()
+        data = [self.data[~removed], new_data]
+        tables = [self.exercise_sessions, self.workout_rollup, self.pair_rollup]
+        for column, key in ((self.columns["WORKOUT_NAME"], "routine"), (self.columns["EXERCISE_NAME"], "exercise")):
+            unified = _unify_categories([frame[column] for frame in data])
+            categories = unified[0].cat.categories
+            data = [frame.assign(**{column: values}) for frame, values in zip(data, unified)]
+            tables = [
+                table.assign(**{key: table[key].cat.set_categories(categories)}) if key in table.columns else table
+                for table in tables
+            ]
+        data = pd.concat(data)
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_values(by=self.columns["DATE"], kind="stable")
+            data.index = pd.DatetimeIndex(data[self.columns["DATE"]].values)
+        self.data = data
+
+        day_data = data[data.index.isin(days)]
+        sessions, workouts, pairs = [table[~table["date"].isin(days).to_numpy()] for table in tables]
+        # only the records of exercises trained on these days can change
+        exercises = pd.unique(pd.concat([
+            tables[0]["exercise"][tables[0]["date"].isin(days).to_numpy()].astype("str"),
+            day_data[self.columns["EXERCISE_NAME"]].astype("str")
+        ]))
+        self.exercise_sessions = self.sort_exercise_sessions(
+            pd.concat([sessions, self.aggregate_exercise_sessions(day_data)], ignore_index=True)
+        )
+        self.workout_rollup = self.sort_by_date(pd.concat([workouts, self.rollup_workouts(day_data)]))
+        self.pair_rollup = self.sort_by_date(pd.concat([pairs, self.rollup_pairs(day_data)]))
+        self.update_records(list(exercises))
+        self.build_time_cube()
+
+    @profiled()
+    def update_date_range(self, start_date: dt.date, end_date: dt.date) -> None:
+        """Updates workout data based on given start and end date.
+
+        Relies on the sorted DatetimeIndex set up by clean_data: the range is 
+        located by binary search and sliced without copying.
+
+        Args:
+            start_date (dt.date): Date after which workouts are included.
+            end_date (dt.date): Date before which workouts are included.
+        """
+        start = self.data.index.searchsorted(pd.Timestamp(start_date), side="left")
+        end = self.data.index.searchsorted(pd.Timestamp(end_date), side="right")
+        self.data = self.data.iloc[start:max(start, end)]
+
+    @profiled(output="exercise_data")
+    def update_exercise_data(self, exercise: str) -> None:
+        """Updates single exercise data based on given exercise name.
+
+        Looks up the sessions of the exercise in the table built by 
+        build_exercise_sessions and restricts them to the dates covered by the
+        current workout data.
+
+        Args:
+            exercise (str): Name of the exercise.
+        """
+        try:
+            location = self.exercise_sessions.index.get_loc(exercise)
+        except KeyError:
+            location = slice(0, 0)
+        if isinstance(location, int):
+            location = slice(location, location + 1)
+        exercise_data = self.exercise_sessions.iloc[location]
+        self.exercise_data = exercise_data.iloc[self.__data_date_slice(exercise_data["date"])]
+
+    def __data_date_span(self) -> Tuple:
+        """Returns the first and the last date of the current workout data."""
+        if len(self.data) == 0:
+            return (None, None)
+        return (self.data.index[0], self.data.index[-1])
+
+    def __data_date_slice(self, dates: pd.Series) -> slice:
+        """Locates the dates covered by the current workout data.
+
+        Args:
+            dates (pd.Series): Sorted dates of an aggregate table.
+
+        Returns:
+            slice: Positions of the dates between the first and the last date 
+            of the current (date filtered) workout data.
+        """
+        first_date, last_date = self.__data_date_span()
+        if first_date is None:
+            return slice(0, 0)
+        start = dates.searchsorted(first_date, side="left")
+        end = dates.searchsorted(last_date, side="right")
+        return slice(start, end)
 
     def calculate_exercise_metric_and_delta(self, column: str, aggregation: str) -> Tuple[str, str]:
         """Perfoms a certain aggregation of a given column of exercise data and 
@@ -170,8 +1472,8 @@ class SePump:
 
         Args:
             column (str): Name of the column.
-            aggregation (str): Aggregation method. Can be one of  [max, sum, 
-                len]
+            aggregation (str): Aggregation method. Can be one of the keys of 
+                RUNNING_AGGREGATIONS (e.g. max, sum, len)
 
         Raises:
             Exception: If not supported aggregation method is provided.
@@ -179,70 +1481,110 @@ class SePump:
         Returns:
             Tuple[str, str]: (Result of aggregation, Delta)
         """
-        if aggregation == "max":
-            metric = self.exercise_data[column].max()
-            if self.prev_exercise_data[column].max() is not np.nan:
-                metric_prev = self.prev_exercise_data[column].max()
-            else:
-                metric_prev = metric
-        elif aggregation == "sum":
-            metric = self.exercise_data[column].sum()
-            if self.prev_exercise_data[column].sum() is not np.nan:
-                metric_prev = self.prev_exercise_data[column].sum()
-            else:
-                metric_prev = metric
-        elif aggregation == "len":
-            metric = len(self.exercise_data[column])
-            metric_prev = len(self.prev_exercise_data)
-        else:
-            raise Exception("Invalid aggregation method.")
-        delta = metric - metric_prev
-        metric = "{:,}".format(int(metric))
-        delta = "{:,}".format(int(delta))
-        return metric, delta
+        return self.calculate_exercise_metrics([(column, aggregation)])[(column, aggregation)]
+
+    @profiled()
+    def calculate_exercise_metrics(self, metrics: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[str, str]]:
+        """Performs several aggregations of exercise data at once and calculates
+            their difference to the state before the last workout.
+
+        Columns sharing an aggregation are reduced together by a single running
+        aggregation over the sessions, which yields the value with and without
+        the last session in one pass.
+
+        Args:
+            metrics (List[Tuple[str, str]]): (Name of the column, Aggregation 
+                method) pairs. See calculate_exercise_metric_and_delta.
 
+        Raises:
+            Exception: If not supported aggregation method is provided.
+
+        Returns:
+            Dict[Tuple[str, str], Tuple[str, str]]: (Result of aggregation, 
+            Delta) per requested (column, aggregation) pair.
+        """
+        columns_by_aggregation = {}
+        for column, aggregation in metrics:
+            if aggregation not in RUNNING_AGGREGATIONS:
+                raise Exception("Invalid aggregation method.")
+            columns_by_aggregation.setdefault(aggregation, {})[column] = None
+
+        results = {}
+        for aggregation, columns in columns_by_aggregation.items():
+            columns = list(columns)
+            running = RUNNING_AGGREGATIONS[aggregation](self.exercise_data[columns])
+            for i, column in enumerate(columns):
+                if len(running) == 0:
+                    metric, metric_prev = 0, 0
+                else:
+                    metric = np.nan_to_num(running[-1, i])
+                    if len(running) > 1:
+                        metric_prev = running[-2, i]
+                    else:
+                        metric_prev = EMPTY_AGGREGATIONS.get(aggregation, metric)
+                    if np.isnan(metric_prev):
+                        metric_prev = metric
+                delta = metric - metric_prev
+                results[(column, aggregation)] = ("{:,}".format(int(metric)), "{:,}".format(int(delta)))
+        return results
+
+    @profiled()
+    def select_workouts(self, workout_name: Optional[str] = None) -> pd.DataFrame:
+        """Selects workouts from the rollup built by build_workout_rollup.
+
+        Args:
+            workout_name (Optional[str]): Name of the workout routine. All 
+                routines are selected if None.
+
+        Returns:
+            pd.DataFrame: Rollup rows of the workouts in the dates covered by 
+            the current workout data.
+        """
+        workouts = self.workout_rollup.iloc[self.__data_date_slice(self.workout_rollup.index)]
+        if workout_name is not None:
+            workouts = workouts[workouts["routine"] == workout_name]
+        return workouts
+
+    @profiled(output="workout_data")
     def update_workout_data(self, workout_name: str) -> None:
         """Updates single workout routine data based on given workout name.
 
         Args:
             workout_name (str): Name of the workout routine.
         """
-        self.workout_data = self.data[self.data[self.columns["WORKOUT_NAME"]] == workout_name]
+        self.workout_data = self.select_workouts(workout_name)
 
+    @profiled(output="workout_data_agg")
     def update_workout_data_agg(self) -> None:
         """Updates aggregated metrics for single workout routine."""
-        self.workout_data_agg = self.workout_data.groupby("workout_uid").agg(**{
-            "date": (self.columns["DATE"], "max"),
-            "total_volume": ("volume", "sum"),
-            "total_reps": (self.columns["REPS"], "sum")
-        })
+        self.workout_data_agg = self.workout_data.set_index("workout_uid")[["date", "volume", "reps"]].rename(
+            columns={"volume": "total_volume", "reps": "total_reps"}
+        )
 
-    def __convert_duration_to_minutes(self, duration: str) -> int:
-        """Converts workout duration from string representation to integers.
+    @profiled(output="filtered_data_agg")
+    def update_filtered_data(
+        self,
+        exercise: Optional[str] = None,
+        workout_name: Optional[str] = None,
+        max_buckets: int = MAX_CHART_POINTS
+    ) -> None:
+        """Updates metrics and buckets of workouts filtered by exercise and 
+            workout routine.
 
-        Args:
-            duration (str): Duration in the format "<hours>h <minutes>m",
-            "<hours>h", or "<minutes>m" (e.g. "1h 20m", "3h", or "30m").
+        Both are looked up in the time cube, so their cost is bounded by the
+        number of buckets regardless of the number of workouts.
 
-        Returns:
-            int: The corresponding number of minutes (e.g. "1h 20m" will return
-            80).
-        
-        Raises:
-            ValueError: If the duration format is invalid.
-        """
-        # Regex to match hours and minutes
-        match = re.match(r'^(?:(\d+)h)?\s*(?:(\d+)m)?', duration)
-        hours = match.group(1)
-        minutes = match.group(2)
-
-        if not match or not (hours or minutes):
-            raise ValueError("Invalid duration format.")
-
-        total_minutes = 0
-        if hours:
-            total_minutes += int(hours) * 60
-        if minutes:
-            total_minutes += int(minutes)
-        
-        return total_minutes
+        Args:
+            exercise (Optional[str]): Name of the exercise. All exercises are 
+                included if None.
+            workout_name (Optional[str]): Name of the workout routine. All 
+                routines are included if None.
+            max_buckets (int): Maximum number of buckets of filtered_data_agg,
+                see choose_granularity.
+        """
+        self.filtered_summary = self.summarize_buckets(exercise, workout_name)
+        self.filtered_granularity = self.choose_granularity(max_buckets)
+        buckets = self.select_buckets(exercise, workout_name, self.filtered_granularity)
+        self.filtered_data_agg = buckets[["date", "volume", "reps"]].rename(
+            columns={"volume": "total_volume", "reps": "total_reps"}
+        )
@@ -1,32 +1,42 @@
+import uuid
 import streamlit as st
-from typing import List
+from typing import Any, Callable
 
+from compute_graph import ComputeGraph
 
-def on_csv_upload():
-    set_true(["updated_csv", "updated_date", "updated_exercise", "updated_workout"])
 
+def get_session_id() -> str:
+    """Returns an id identifying the current session across reruns."""
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = uuid.uuid4().hex
+    return st.session_state["session_id"]
 
-def on_date_change():
-    set_true(["updated_date", "updated_exercise", "updated_workout"])
 
+def get_warmup(new_warmup: Callable[[], Any]) -> Any:
+    """Returns the warm-up of the current session.
 
-def on_exercise_change():
-    set_true(["updated_exercise"])
+    Args:
+        new_warmup (Callable[[], Any]): Creates the warm-up when the session
+            does not have one yet.
 
+    Returns:
+        Any: Warm-up kept in the session state across reruns, may be None.
+    """
+    if "warmup" not in st.session_state:
+        st.session_state["warmup"] = new_warmup()
+    return st.session_state["warmup"]
 
-def on_workout_change():
-    set_true(["updated_workout"])
 
+def get_compute_graph(build_graph: Callable[[], ComputeGraph]) -> ComputeGraph:
+    """Returns the computation graph of the current session.
 
-def init_session_state_updates():
-    set_false(["updated_csv", "updated_date", "updated_exercise", "updated_workout"])
+    Args:
+        build_graph (Callable[[], ComputeGraph]): Builds the graph when the 
+            session does not have one yet.
 
-
-def set_true(entries: List) -> None:
-    for entry in entries:
-        st.session_state[entry] = True
-
-
-def set_false(entries: List) -> None:
-    for entry in entries:
-        st.session_state[entry] = False
+    Returns:
+        ComputeGraph: Graph kept in the session state across reruns.
+    """
+    if "compute_graph" not in st.session_state:
+        st.session_state["compute_graph"] = build_graph()
+    return st.session_state["compute_graph"]
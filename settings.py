@@ -0,0 +1,46 @@
+import os
+import tempfile
+from os.path import join
+
+# Directory and size budget of the on-disk cache of cleaned workout data.
+CACHE_DIR = os.environ.get("LIFTWISE_CACHE_DIR", join(tempfile.gettempdir(), "liftwise-cache"))
+CACHE_SIZE_BUDGET = int(os.environ.get("LIFTWISE_CACHE_SIZE_MB", "512")) * 2**20
+
+# Shows internals such as the computation graph's cache statistics in the sidebar.
+DEBUG = os.environ.get("LIFTWISE_DEBUG", "0") == "1"
+
+# Maximum number of points sent to the browser per trend chart.
+MAX_CHART_POINTS = int(os.environ.get("LIFTWISE_MAX_CHART_POINTS", "500"))
+
+# Directory and size budget of the per user stores of cleaned workout data.
+STORE_DIR = os.environ.get("LIFTWISE_STORE_DIR", join(tempfile.gettempdir(), "liftwise-store"))
+STORE_SIZE_BUDGET = int(os.environ.get("LIFTWISE_STORE_SIZE_MB", "1024")) * 2**20
+# Number of csv rows per chunk of the streaming ingest.
+INGEST_CHUNK_SIZE = int(os.environ.get("LIFTWISE_INGEST_CHUNK_SIZE", "100000"))
+# Number of threads streaming the files of a multi-file upload at once.
+INGEST_WORKERS = int(os.environ.get("LIFTWISE_INGEST_WORKERS", "4"))
+
+# Memory budget of the cleaned data shared by all sessions and the time after
+# which inactive sessions release their share.
+SHARED_MEMORY_BUDGET = int(os.environ.get("LIFTWISE_SHARED_MEMORY_MB", "1024")) * 2**20
+SESSION_IDLE_TIMEOUT = float(os.environ.get("LIFTWISE_SESSION_IDLE_MINUTES", "30")) * 60
+
+# Stores text columns such as notes as Arrow strings ("1"), which take less
+# memory and are handed to Arrow based consumers (chart serialization, caches)
+# without conversion, or as Python objects ("0"), e.g. to compare both.
+ARROW_STRINGS = os.environ.get("LIFTWISE_ARROW_STRINGS", "1") == "1"
+
+# Number of threads preparing the aggregates and charts of all exercises and
+# workout routines in the background after an upload, 0 disables the warm-up.
+WARMUP_THREADS = int(os.environ.get("LIFTWISE_WARMUP_THREADS", "2"))
+
+# Records the time and rows of SePump methods, graph nodes and page sections
+# ("1"), additionally traces allocated bytes at a considerable cost
+# ("memory"), or is disabled without any overhead ("0").
+PROFILE = os.environ.get("LIFTWISE_PROFILE", "0")
+# File the profile records are appended to as json lines.
+PROFILE_LOG = os.environ.get("LIFTWISE_PROFILE_LOG")
+# Allocations are traced process wide, so memory profiling disables the
+# warm-up, whose threads would allocate during the measured sections.
+if PROFILE == "memory":
+    WARMUP_THREADS = 0
@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from sepump import SePump
+from settings import SESSION_IDLE_TIMEOUT, SHARED_MEMORY_BUDGET
+
+
+def memory_usage(sepump: SePump) -> int:
+    """Returns the bytes held by the cleaned data and aggregate tables.
+
+    Args:
+        sepump (SePump): SePump with cleaned data and aggregate tables.
+
+    Returns:
+        int: Deep memory usage in bytes.
+    """
+    tables = [sepump.data, sepump.exercise_sessions, sepump.workout_rollup, sepump.pair_rollup, sepump.records]
+    tables += list((sepump.time_cube or {}).values())
+    return sum(int(table.memory_usage(deep=True).sum()) for table in tables if table is not None)
+
+
+class SharedStore:
+    """Process-wide store of cleaned workout data shared by all sessions.
+
+    Sessions uploading the same csv share a single SePump instead of holding
+    a copy each. Shared SePumps must not be mutated: every computation after
+    cleaning works on shallow copies whose filtered data are slices of the
+    shared frames.
+
+    Memory is kept within a budget by dropping data no session uses, least
+    recently used first, and then by releasing the least recently active
+    sessions. Sessions idle for longer than the idle timeout are always
+    released. Releasing a session drops the values it computed, so that its
+    data can be freed; it reloads them from the disk cache when it becomes
+    active again.
+    """
+
+    def __init__(self, memory_budget: int = SHARED_MEMORY_BUDGET, idle_timeout: float = SESSION_IDLE_TIMEOUT):
+        """Initializes an empty store.
+
+        Args:
+            memory_budget (int): Bytes the shared data may occupy.
+            idle_timeout (float): Seconds after which inactive sessions are
+                released.
+        """
+        self.memory_budget = memory_budget
+        self.idle_timeout = idle_timeout
+        self.entries = OrderedDict()
+        self.sessions: Dict[str, Dict] = {}
+        self.lock = threading.RLock()
+
+    def touch(self, session_id: str, release: Callable[[], None]) -> None:
+        """Marks a session as active and releases idle sessions.
+
+        Args:
+            session_id (str): Id of the session.
+            release (Callable[[], None]): Drops everything the session
+                computed from shared data.
+        """
+        with self.lock:
+            session = self.sessions.setdefault(session_id, {"key": None})
+            session["last_seen"] = time.monotonic()
+            session["release"] = release
+            self.evict(keep=session_id)
+
+    def get(self, key: str, load: Callable[[], SePump], session_id: Optional[str] = None) -> SePump:
+        """Returns the shared SePump of a csv, loading it if necessary.
+
+        Args:
+            key (str): Content hash of the csv.
+            load (Callable[[], SePump]): Loads the cleaned data and aggregate
+                tables of the csv.
+            session_id (Optional[str]): Session using the data.
+
+        Returns:
+            SePump: Shared SePump, must not be mutated.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        if entry is None:
+            # loading takes long, other sessions are not blocked meanwhile
+            sepump = load()
+            with self.lock:
+                entry = self.entries.setdefault(key, (sepump, memory_usage(sepump)))
+                self.entries.move_to_end(key)
+        with self.lock:
+            if session_id is not None:
+                self.sessions.setdefault(session_id, {"last_seen": time.monotonic(), "release": None})["key"] = key
+            self.evict(keep=session_id)
+        return entry[0]
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Releases idle sessions and drops data until the budget is met.
+
+        Args:
+            keep (Optional[str]): Session that is never released, usually the
+                one currently running.
+        """
+        with self.lock:
+            now = time.monotonic()
+            for session_id, session in list(self.sessions.items()):
+                if session_id != keep and now - session["last_seen"] > self.idle_timeout:
+                    self.__release(session_id)
+            by_activity = sorted(
+                (session["last_seen"], session_id) for session_id, session in self.sessions.items()
+                if session_id != keep
+            )
+            while self.memory() > self.memory_budget:
+                used = {session["key"] for session in self.sessions.values()}
+                unused = [key for key in self.entries if key not in used]
+                if unused:
+                    del self.entries[unused[0]]
+                elif by_activity:
+                    self.__release(by_activity.pop(0)[1])
+                else:
+                    break
+
+    def memory(self) -> int:
+        """Returns the bytes occupied by the shared data."""
+        with self.lock:
+            return sum(usage for _, usage in self.entries.values())
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of shared entries and sessions and the memory
+        they occupy."""
+        with self.lock:
+            return {"entries": len(self.entries), "sessions": len(self.sessions), "bytes": self.memory()}
+
+    def __release(self, session_id: str) -> None:
+        session = self.sessions.pop(session_id)
+        if session["release"] is not None:
+            session["release"]()
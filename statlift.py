@@ -1,32 +1,118 @@
+# Only streamlit and the settings are imported up front, so that the upload
+# prompt of a new session or after a restart renders without waiting for
+# pandas, altair and the analytics pipeline. These are imported once a file
+# arrives, see benchmarks/bench_import_time.py.
+from __future__ import annotations
+
 import streamlit as st
-import pandas as pd
-import altair as alt
+import json
 from os.path import join, dirname
-from session_state_handler import init_session_state_updates, on_csv_upload, \
-    on_date_change, on_exercise_change, on_workout_change
-from sepump import SePump
+from typing import TYPE_CHECKING, Dict, List, Optional
+from functools import partial
+from settings import DEBUG, WARMUP_THREADS
 from streamlit_utils import v_space
 
-def show_total_stats(data: pd.DataFrame, weight_metric: str) -> None:
+if TYPE_CHECKING:
+    import altair as alt
+    import pandas as pd
+    from concurrent.futures import ThreadPoolExecutor
+    from shared_store import SharedStore
+    from warmup import Warmup
+    from workout_cache import WorkoutCache
+    from workout_store import WorkoutStore
+
+
+@st.cache_resource
+def get_workout_cache() -> WorkoutCache:
+    """Returns the process-wide cache of cleaned workout data."""
+    from workout_cache import WorkoutCache
+    return WorkoutCache()
+
+
+@st.cache_resource
+def get_workout_store() -> WorkoutStore:
+    """Returns the process-wide store of cleaned workout data per user."""
+    from workout_store import WorkoutStore
+    return WorkoutStore()
+
+
+@st.cache_resource
+def get_shared_store() -> SharedStore:
+    """Returns the process-wide store of cleaned data shared by all sessions."""
+    from shared_store import SharedStore
+    return SharedStore()
+
+
+@st.cache_resource
+def get_warmup_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide thread pool of the background warm-up."""
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=WARMUP_THREADS, thread_name_prefix="liftwise-warmup")
+
+
+def new_warmup() -> Optional[Warmup]:
+    """Returns a warm-up for a new session, None if it is disabled."""
+    from warmup import Warmup
+    return Warmup(get_warmup_executor()) if WARMUP_THREADS > 0 else None
+
+
+def show_total_stats(summary: Dict[str, float], weight_metric: str) -> None:
     """Shows aggregated metrics across all workouts and exercises in data.
 
     Args:
-        data (pd.DataFrame): Pandas dataframe containing workout data.
+        summary (Dict[str, float]): Metrics as computed by 
+            analytics.summarize_workouts or SePump.summarize_buckets.
     """
-    total_workouts = len(pd.unique(data["workout_uid"]))
-    total_sets = len(data[st.session_state["columns"]["REPS"]])
-    total_reps = sum(data[st.session_state["columns"]["REPS"]])
-    total_volume = sum(data["volume"])
-    duration_data = data.groupby("workout_uid").agg(**{
-        "duration": (st.session_state["columns"]["WORKOUT_DURATION"], "first")
-    })
-    total_duration = duration_data["duration"].fillna(0).sum()
     cl1, cl2, cl3, cl4, cl5 = st.columns(5)
-    cl1.metric(label="\# of Workouts", value="{:,}".format(int(total_workouts)))
-    cl2.metric(label=f"Total Volume ({weight_metric})", value="{:,}".format(int(total_volume)))
-    cl3.metric(label="\# of Sets", value="{:,}".format(int(total_sets)))
-    cl4.metric(label="\# of Reps", value="{:,}".format(int(total_reps)))
-    cl5.metric(label="\# of Minutes trained", value="{:,}".format(int(total_duration)))
+    cl1.metric(label="\# of Workouts", value="{:,}".format(summary["workouts"]))
+    cl2.metric(label=f"Total Volume ({weight_metric})", value="{:,}".format(int(summary["volume"])))
+    cl3.metric(label="\# of Sets", value="{:,}".format(summary["sets"]))
+    cl4.metric(label="\# of Reps", value="{:,}".format(int(summary["reps"])))
+    cl5.metric(label="\# of Minutes trained", value="{:,}".format(int(summary["minutes"])))
+
+def show_record_board(records: pd.DataFrame, weight_metric: str) -> None:
+    """Shows the personal records of every exercise with the dates they were set.
+
+    Args:
+        records (pd.DataFrame): Records as selected by SePump.select_records.
+        weight_metric (str): Unit of the weights, e.g. kg.
+    """
+    import pandas as pd
+    labels = {
+        "max_weight": f"Max Weight ({weight_metric})",
+        "max_reps": "Max Reps",
+        "max_volume": f"Max Volume ({weight_metric})",
+        "max_e1rm": f"Est. 1RM Epley ({weight_metric})",
+        "max_e1rm_brzycki": f"Est. 1RM Brzycki ({weight_metric})"
+    }
+    board = pd.DataFrame(index=pd.Index(records["exercise"].astype("str"), name="Exercise"))
+    for column, label in labels.items():
+        board[label] = records[column].round(1).to_numpy()
+        board[f"{label} set on"] = records[column + "_date"].dt.date.to_numpy()
+    st.dataframe(board, use_container_width=True)
+
+def trend_chart(chart_data: pd.DataFrame, column: str, metric: str, title: str, tooltip: List = None) -> alt.LayerChart:
+    """Plots a metric over time together with its regression line.
+
+    Args:
+        chart_data (pd.DataFrame): Chart data as prepared by 
+            chart_data.prepare_trend_data.
+        column (str): Name of the plotted column.
+        metric (str): Display name of the metric.
+        title (str): Title of the chart.
+        tooltip (List): Tooltips of the data points.
+
+    Returns:
+        alt.LayerChart: Line chart with the regression line in red.
+    """
+    import altair as alt
+    base = alt.Chart(chart_data, title=title).encode(x=alt.X("date", title="Date"))
+    chart = base.mark_line(point=True).encode(
+        y=alt.Y(column, title=metric),
+        tooltip=tooltip if tooltip is not None else alt.Undefined
+    )
+    trend = base.mark_line(color="red").encode(y=alt.Y("trend", title=metric))
+    return chart + trend
 
 def get_metrics_from_df(columns: str):
     weight_metric = "kg" if "kg" in columns.lower() else "lbs"
@@ -48,7 +134,11 @@ if __name__ == "__main__":
     )
     st.title("LiftWise (Beta) - Free Analytics for Hevy Data :rocket:")
 
-    # Google Analytics
+    # load csv file
+    st.write("## :page_facing_up: Upload csv files (exported from Hevy-App):")
+    csvs = st.file_uploader("_", label_visibility="hidden", accept_multiple_files=True)
+
+    # Google Analytics, injected after the upload prompt so it never delays it
     GA_TRACKING_ID = st.secrets["google_analytics"]["GA_TRACKING_ID"]
     
     # Create the GA tracking code using streamlit's built-in components
@@ -71,35 +161,42 @@ if __name__ == "__main__":
     # Inject the script using a custom component
     st.components.v1.html(ga_script, height=0)
 
-    # initialize workout data handler
-    sepump = SePump()
-
-    # load csv file
-    st.write("## :page_facing_up: Upload csv file (exported from Hevy-App):")
-    csv = st.file_uploader("_", label_visibility="hidden", on_change=on_csv_upload)
-
     # # don't calculate / render rest of the page if no csv is provided
-    if csv is None:
+    if not csvs:
         exit()
+
+    import altair as alt
+    import pandas as pd
+    from analytics import summarize_workouts
+    from instrumentation import Sections, collect
+    from pipeline import build_pipeline, release_pipeline
+    from session_state_handler import get_compute_graph, get_session_id, get_warmup
+
+    # records of this rerun, None unless profiling is enabled
+    profile_records = collect()
+    sections = Sections()
+
+    # computation graph of this session, see pipeline.build_pipeline
+    session_id = get_session_id()
+    shared_store = get_shared_store()
+    session_warmup = get_warmup(new_warmup)
+    graph = get_compute_graph(
+        lambda: build_pipeline(
+            get_workout_cache(), get_workout_store(), join(dirname(__file__), "columns.json"), session_warmup,
+            shared_store, session_id
+        )
+    )
+    # releases idle sessions, this one releases its data once idle itself
+    shared_store.touch(session_id, partial(release_pipeline, graph, session_warmup))
     
-    # load & clean data and save it in streamlit session state
-    if st.session_state["updated_csv"]:
-        sepump.load_data(csv)
-        columns_path = join(dirname(__file__), "columns.json")
-        try:
-            sepump.load_column_names(columns_path)
-        except Exception:
-            st.error("Seems like your file is not supported by LiftWise")
-            exit()
-        sepump.clean_data()
-        st.session_state["cleaned_data"] = sepump.data
-        st.session_state["data"] = sepump.data
-        st.session_state["columns"] = sepump.columns
-        st.session_state["start_date"] = sepump.data[st.session_state["columns"]["DATE"]].min()
-        st.session_state["end_date"] = sepump.data[st.session_state["columns"]["DATE"]].max()
-    else:
-        sepump.data = st.session_state["data"]
-        sepump.columns = st.session_state["columns"]
+    # load, clean & merge data (only recomputed for new files)
+    sections.start("upload")
+    graph.set_param("uploads", csvs, key=tuple((csv.name, csv.size, getattr(csv, "file_id", None)) for csv in csvs))
+    try:
+        sepump = graph.get("clean")
+    except Exception:
+        st.error("Seems like one of your files is not supported by LiftWise")
+        exit()
 
     # Metrics
     metrics = get_metrics_from_df(str(sepump.columns))
@@ -109,69 +206,66 @@ if __name__ == "__main__":
     st.divider()
     
     # set date range
+    sections.start("date range", sepump)
     st.write("## :date: Select date range:")
     fl1, fl2 = st.columns(2)
     start_date_filter = fl1.date_input(
         "**Start date**", 
-        st.session_state["start_date"],
-        on_change=on_date_change
+        sepump.data.index[0].date()
     )
     end_date_filter = fl2.date_input(
         "**End date**",
-        st.session_state["end_date"],
-        on_change=on_date_change
+        sepump.data.index[-1].date()
     )
-    
-    if st.session_state["updated_date"]:
-        sepump.data = st.session_state["cleaned_data"]
-        sepump.update_date_range(start_date_filter, end_date_filter)
-        st.session_state["data"] = sepump.data
-        st.session_state["columns"] = sepump.columns
+    graph.set_param("start_date", start_date_filter)
+    graph.set_param("end_date", end_date_filter)
+    sepump = graph.get("date_filter")
     
     # don't calculate / render rest of the page if there are no workouts in 
     # specified date range
-    if len(st.session_state["data"]) == 0:
+    if len(sepump.data) == 0:
         exit()
+    exercises, workout_names = graph.get("options")
+    # prepare all other selections while the page renders
+    warmup = graph.get("warmup") if "warmup" in graph.nodes else None
 
     ###########################################################################
     # 1. Overall metrics of workouts in date range
     ###########################################################################
 
     st.divider()
+    sections.start("total stats", sepump)
     st.write("## :bar_chart: Metrics across all workouts:")
-    show_total_stats(st.session_state["data"], weight_metric)
+    show_total_stats(sepump.summarize_buckets(), weight_metric)
+    st.write("### :trophy: Personal records:")
+    show_record_board(graph.get("record_board"), weight_metric)
 
     ###########################################################################
     # 2. Metrics and graphs for individual exercises
     ###########################################################################
 
     st.divider()
+    sections.start("exercise", sepump)
     st.write("## :mechanical_arm: Metrics for individual exercises:")
 
     exercise_filter = st.selectbox(
         "**Select exercise**",
-        pd.unique(st.session_state["data"][st.session_state["columns"]["EXERCISE_NAME"]]),
-        on_change=on_exercise_change
+        exercises
     )
-
-    if st.session_state["updated_exercise"]:
-        sepump.update_exercise_data(exercise_filter)
-        st.session_state["exercise_data"] = sepump.exercise_data
-        st.session_state["previous_exercise_data"] = sepump.prev_exercise_data
-    else:
-        sepump.exercise_data = st.session_state["exercise_data"]
-        sepump.prev_exercise_data = st.session_state["previous_exercise_data"]
+    graph.set_param("exercise", exercise_filter)
+    exercise_sepump = graph.get("exercise_aggregates")
 
     # 2a. Metrics
     v_space(1)
     st.write(f"##### :bar_chart: Metrics for *{exercise_filter}*:")
     
-    total_sets, total_sets_delta = sepump.calculate_exercise_metric_and_delta("date", "len")
-    total_reps, total_reps_delta = sepump.calculate_exercise_metric_and_delta("total_reps", "sum")
-    total_volume, total_volume_delta = sepump.calculate_exercise_metric_and_delta("total_volume", "sum")
-    max_weight, max_weight_delta = sepump.calculate_exercise_metric_and_delta("max_weight", "max")
-    max_reps, max_reps_delta = sepump.calculate_exercise_metric_and_delta("max_reps", "max")
-    max_volume, max_volume_delta = sepump.calculate_exercise_metric_and_delta("max_volume", "max")
+    exercise_metrics = graph.get("exercise_metrics")
+    total_sets, total_sets_delta = exercise_metrics[("date", "len")]
+    total_reps, total_reps_delta = exercise_metrics[("total_reps", "sum")]
+    total_volume, total_volume_delta = exercise_metrics[("total_volume", "sum")]
+    max_weight, max_weight_delta = exercise_metrics[("max_weight", "max")]
+    max_reps, max_reps_delta = exercise_metrics[("max_reps", "max")]
+    max_volume, max_volume_delta = exercise_metrics[("max_volume", "max")]
 
     ecl1, ecl2, ecl3 = st.columns(3)
     ecl1.metric(label="Total Sets", value=total_sets, delta=total_sets_delta)
@@ -198,23 +292,24 @@ if __name__ == "__main__":
         metric_to_column.keys(),
         default=metric_to_column.keys()
     )
+    graph.set_param("exercise_chart_columns", tuple(metric_to_column[metric] for metric in selected_metrics))
+    exercise_charts = graph.get("exercise_charts")
     graph_columns = st.columns(2)
 
     for m, metric in enumerate(selected_metrics):
         col_index = m % 2
         col = graph_columns[col_index]
-        chart = alt.Chart(
-            sepump.exercise_data, title=f"{metric} for {exercise_filter}"
-        ).mark_line(point=True).encode(
-            x=alt.X("date", title="Date"),
-            y=alt.Y(metric_to_column[metric], title=metric),
+        chart = trend_chart(
+            exercise_charts[metric_to_column[metric]],
+            metric_to_column[metric],
+            metric,
+            f"{metric} for {exercise_filter}",
             tooltip=[
                 alt.Tooltip("date", title="Date"),
                 alt.Tooltip(metric_to_column[metric], title=metric),
                 alt.Tooltip("notes", title="Notes")
             ]
         )
-        chart += chart.transform_regression('date', metric_to_column[metric]).mark_line(color="red")
         col.altair_chart(chart, use_container_width=True)
     
     ###########################################################################
@@ -222,23 +317,19 @@ if __name__ == "__main__":
     ###########################################################################
 
     st.divider()
+    sections.start("workout routine", sepump)
     st.write("## :repeat: Metrics for individual workout routines:")
     workout_filter = st.selectbox(
         "**Select workout routine**",
-        pd.unique(st.session_state["data"][st.session_state["columns"]["WORKOUT_NAME"]]),
-        on_change=on_workout_change
+        workout_names
     )
-
-    if st.session_state["updated_workout"]:
-        sepump.update_workout_data(workout_filter)
-        sepump.update_workout_data_agg()
-        st.session_state["workout_data"] = sepump.workout_data
-        st.session_state["workout_data_agg"] = sepump.workout_data_agg
+    graph.set_param("workout", workout_filter)
+    workout_sepump = graph.get("workout_aggregates")
     
     # 3a. Metrics
     v_space(1)
     st.write(f"##### :bar_chart: Metrics for workout routine *{workout_filter}*:")
-    show_total_stats(st.session_state["workout_data"], weight_metric)
+    show_total_stats(summarize_workouts(workout_sepump.workout_data), weight_metric)
 
     # 3b. Graphs
     v_space(1)
@@ -247,17 +338,17 @@ if __name__ == "__main__":
         "Total Volume (per workout)": "total_volume",
         "Total Reps (per workout)": "total_reps"
     }
+    workout_charts = graph.get("workout_charts")
     graph_columns_workout = st.columns(2)
     for m, metric in enumerate(metric_to_column_workout.keys()):
         col_index = m % 2
         col = graph_columns_workout[col_index]
-        chart = alt.Chart(
-            st.session_state["workout_data_agg"], title=f"{metric} for {workout_filter}"
-        ).mark_line(point=True).encode(
-            x=alt.X("date", title="Date"),
-            y=alt.Y(metric_to_column_workout[metric], title=metric),
+        chart = trend_chart(
+            workout_charts[metric_to_column_workout[metric]],
+            metric_to_column_workout[metric],
+            metric,
+            f"{metric} for {workout_filter}"
         )
-        chart += chart.transform_regression('date', metric_to_column_workout[metric]).mark_line(color="red")
         col.altair_chart(chart, use_container_width=True)
 
     ###########################################################################
@@ -265,6 +356,7 @@ if __name__ == "__main__":
     ###########################################################################
 
     st.divider()
+    sections.start("combined filter", sepump)
     st.write("## 🔍 Filter by Exercise and Workout:")
     
     # Create two columns for the filters
@@ -273,63 +365,72 @@ if __name__ == "__main__":
     # Exercise filter
     selected_exercise = filter_col1.selectbox(
         "**Select exercise**",
-        ["All"] + list(pd.unique(st.session_state["data"][st.session_state["columns"]["EXERCISE_NAME"]])),
+        ["All"] + exercises,
         key="combined_exercise_filter"
     )
     
     # Workout filter
     selected_workout = filter_col2.selectbox(
         "**Select workout routine**",
-        ["All"] + list(pd.unique(st.session_state["data"][st.session_state["columns"]["WORKOUT_NAME"]])),
+        ["All"] + workout_names,
         key="combined_workout_filter"
     )
 
     # Filter the data based on selections
-    filtered_data = st.session_state["data"].copy()
-    if selected_exercise != "All":
-        filtered_data = filtered_data[filtered_data[st.session_state["columns"]["EXERCISE_NAME"]] == selected_exercise]
-    if selected_workout != "All":
-        filtered_data = filtered_data[filtered_data[st.session_state["columns"]["WORKOUT_NAME"]] == selected_workout]
+    graph.set_param("combined_exercise", None if selected_exercise == "All" else selected_exercise)
+    graph.set_param("combined_workout", None if selected_workout == "All" else selected_workout)
+    combined_sepump = graph.get("combined_filter")
 
     # Show metrics for filtered data
-    if len(filtered_data) > 0:
+    if combined_sepump.filtered_summary["workouts"] > 0:
         v_space(1)
         st.write("##### :bar_chart: Metrics for filtered data:")
-        show_total_stats(filtered_data, weight_metric)
+        show_total_stats(combined_sepump.filtered_summary, weight_metric)
 
         # Add graphs for filtered data
         v_space(1)
         st.write("##### :chart_with_upwards_trend: Graphs for filtered data:")
-        
-        # Prepare aggregated data for graphs
-        date_col = st.session_state["columns"]["DATE"]  # Get the correct date column name
-        filtered_data_agg = filtered_data.groupby(date_col).agg({
-            "volume": "sum",
-            st.session_state["columns"]["REPS"]: "sum"
-        }).reset_index()
-        filtered_data_agg.columns = ["date", "total_volume", "total_reps"]
+        combined_charts = graph.get("combined_charts")
 
+        # long date ranges are plotted per week or month
         metric_to_column_filtered = {
-            "Total Volume (per workout)": "total_volume",
-            "Total Reps (per workout)": "total_reps"
+            f"Total Volume (per {combined_sepump.filtered_granularity})": "total_volume",
+            f"Total Reps (per {combined_sepump.filtered_granularity})": "total_reps"
         }
         
         graph_columns_filtered = st.columns(2)
         for m, metric in enumerate(metric_to_column_filtered.keys()):
             col_index = m % 2
             col = graph_columns_filtered[col_index]
-            chart = alt.Chart(
-                filtered_data_agg, 
-                title=f"{metric} for {selected_exercise if selected_exercise != 'All' else 'All Exercises'} "
-                      f"in {selected_workout if selected_workout != 'All' else 'All Workouts'}"
-            ).mark_line(point=True).encode(
-                x=alt.X("date", title="Date"),
-                y=alt.Y(metric_to_column_filtered[metric], title=metric),
+            chart = trend_chart(
+                combined_charts[metric_to_column_filtered[metric]],
+                metric_to_column_filtered[metric],
+                metric,
+                f"{metric} for {selected_exercise if selected_exercise != 'All' else 'All Exercises'} "
+                f"in {selected_workout if selected_workout != 'All' else 'All Workouts'}"
             )
-            chart += chart.transform_regression('date', metric_to_column_filtered[metric]).mark_line(color="red")
             col.altair_chart(chart, use_container_width=True)
     else:
         st.warning("No data available for the selected combination of exercise and workout.")
-    
-    # Reset update-triggers in session state to False.
-    init_session_state_updates()
+
+    sections.stop()
+
+    if DEBUG:
+        st.sidebar.write("### Computation graph")
+        st.sidebar.dataframe(pd.DataFrame(graph.stats()).T)
+        st.sidebar.write("### Shared data")
+        st.sidebar.write(shared_store.stats())
+        if warmup is not None:
+            st.sidebar.write("### Warm-up")
+            st.sidebar.write(warmup.stats())
+        if profile_records is not None:
+            st.sidebar.write("### Profile")
+            st.sidebar.dataframe(pd.DataFrame(profile_records)[
+                ["name", "depth", "seconds", "rows_in", "rows_out", "allocated_bytes"]
+            ])
+            st.sidebar.download_button(
+                "Download profile",
+                json.dumps(profile_records, indent=1),
+                file_name="liftwise-profile.json",
+                mime="application/json"
+            )
@@ -0,0 +1,71 @@
+"""Builds small synthetic Hevy exports for the tests."""
+import datetime as dt
+import io
+import random
+
+import pandas as pd
+
+HEVY_HEADER = [
+    "title", "start_time", "end_time", "description", "exercise_title",
+    "superset_id", "exercise_notes", "set_index", "set_type", "weight_kg",
+    "reps", "distance_km", "duration_seconds", "rpe"
+]
+EXERCISES = ["Bench Press (Barbell)", "Squat (Barbell)", "Deadlift (Barbell)", "Pull Up", "Leg Press"]
+ROUTINES = ["Push", "Pull", "Legs"]
+DATE_FORMAT = "%d %b %Y, %H:%M"
+
+
+def hevy_export(workouts: int, first_day: dt.date = dt.date(2023, 1, 2), seed: int = 0) -> pd.DataFrame:
+    """Returns the rows of a Hevy export (kg) as strings, oldest workout
+        first.
+
+    Args:
+        workouts (int): Number of workouts.
+        first_day (dt.date): Day of the first workout.
+        seed (int): Seed of the random workouts.
+
+    Returns:
+        pd.DataFrame: One row per set with the HEVY_HEADER columns.
+    """
+    rnd = random.Random(seed)
+    day = dt.datetime.combine(first_day, dt.time(8))
+    rows = []
+    for _ in range(workouts):
+        start = day + dt.timedelta(minutes=rnd.randint(0, 9 * 60))
+        end = start + dt.timedelta(minutes=rnd.randint(30, 90))
+        routine = rnd.choice(ROUTINES)
+        for exercise in rnd.sample(EXERCISES, rnd.randint(1, 3)):
+            for set_index in range(rnd.randint(1, 4)):
+                rows.append({
+                    "title": routine,
+                    "start_time": start.strftime(DATE_FORMAT),
+                    "end_time": end.strftime(DATE_FORMAT),
+                    "description": "",
+                    "exercise_title": exercise,
+                    "superset_id": "",
+                    "exercise_notes": "felt good" if set_index == 0 and rnd.random() < 0.3 else "",
+                    "set_index": str(set_index),
+                    "set_type": "normal",
+                    "weight_kg": str(rnd.choice([20, 40, 60, 62.5, 80, 100])),
+                    "reps": str(rnd.randint(1, 12)),
+                    "distance_km": "",
+                    "duration_seconds": str(int((end - start).total_seconds())),
+                    "rpe": ""
+                })
+        day += dt.timedelta(days=rnd.randint(1, 3))
+    return pd.DataFrame(rows, columns=HEVY_HEADER)
+
+
+def to_csv(rows: pd.DataFrame) -> bytes:
+    """Returns the rows as csv file content."""
+    return rows.to_csv(index=False).encode()
+
+
+def workout_ids(rows: pd.DataFrame) -> pd.Series:
+    """Returns an id per row identifying its workout."""
+    return rows["title"] + "|" + rows["start_time"]
+
+
+def upload(content: bytes) -> io.BytesIO:
+    """Returns the content as an uploaded file."""
+    return io.BytesIO(content)
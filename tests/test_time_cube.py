@@ -0,0 +1,132 @@
+"""Compares buckets and totals taken from the time cube with aggregating the
+cleaned workout data of the date range."""
+import copy
+import datetime as dt
+import itertools
+import unittest
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from sepump import CUBE_MEASURES, GRANULARITIES, SePump
+from tests.exports import EXERCISES, ROUTINES, hevy_export, to_csv, upload
+
+# Ranges starting and ending in the middle of a week and of a month, one
+# within a single week and one within a single month.
+DATE_RANGES = [
+    (dt.date(2023, 1, 18), dt.date(2023, 6, 14)),
+    (dt.date(2023, 2, 15), dt.date(2023, 9, 21)),
+    (dt.date(2023, 3, 8), dt.date(2023, 3, 10)),
+    (dt.date(2023, 4, 12), dt.date(2023, 4, 27))
+]
+
+
+def bucket_starts(dates: pd.Series, granularity: str) -> pd.Series:
+    """Returns the first days of the buckets of the dates."""
+    if granularity == "week":
+        return dates - pd.to_timedelta(dates.dt.weekday, unit="D")
+    if granularity == "month":
+        return dates.dt.to_period("M").dt.start_time
+    return dates
+
+
+class TimeCubeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.sepump = SePump()
+        cls.sepump.stream_data(upload(to_csv(hevy_export(150))))
+        cls.sepump.build_aggregates()
+
+    def filtered(self, start_date: dt.date, end_date: dt.date) -> SePump:
+        sepump = copy.copy(self.sepump)
+        sepump.update_date_range(start_date, end_date)
+        first, last = sepump.data.index[0], sepump.data.index[-1]
+        # the range has partial weeks and months at both ends
+        self.assertNotEqual(first.weekday(), 0)
+        self.assertNotEqual(first.day, 1)
+        self.assertNotEqual(last.weekday(), 6)
+        self.assertEqual(last.month, (last + pd.Timedelta(days=1)).month)
+        return sepump
+
+    def expected_buckets(
+        self,
+        sepump: SePump,
+        exercise: Optional[str],
+        workout_name: Optional[str],
+        granularity: str
+    ) -> pd.DataFrame:
+        """Aggregates the cleaned data of the date range per bucket."""
+        columns = sepump.columns
+        data = sepump.data
+        mask = np.ones(len(data), dtype=bool)
+        if exercise is not None:
+            mask &= (data[columns["EXERCISE_NAME"]] == exercise).to_numpy()
+        if workout_name is not None:
+            mask &= (data[columns["WORKOUT_NAME"]] == workout_name).to_numpy()
+        rows = data[mask].reset_index(drop=True)
+        rows["bucket"] = bucket_starts(rows[columns["DATE"]], granularity)
+        workouts = rows.groupby(["bucket", "workout_uid"])[columns["WORKOUT_DURATION"]].first().groupby("bucket")
+        sets = rows.groupby("bucket")
+        return pd.DataFrame({
+            "workouts": workouts.size(),
+            "sets": sets.size(),
+            "reps": sets[columns["REPS"]].sum(),
+            "volume": sets["volume"].sum(),
+            "duration": workouts.sum(),
+            "max_weight": sets[columns["WEIGHT"]].max()
+        })[list(CUBE_MEASURES)].rename_axis("date").reset_index()
+
+    def assert_buckets(self, buckets: pd.DataFrame, expected: pd.DataFrame) -> None:
+        buckets = buckets.reset_index(drop=True)
+        self.assertEqual(list(buckets["date"]), list(expected["date"]))
+        for measure in CUBE_MEASURES:
+            np.testing.assert_allclose(
+                buckets[measure].to_numpy(np.float64), expected[measure].to_numpy(np.float64), rtol=1e-5,
+                err_msg=measure
+            )
+
+    def test_select_buckets(self):
+        for (start_date, end_date), exercise, workout_name, granularity in itertools.product(
+            DATE_RANGES, [None] + EXERCISES[:2], [None] + ROUTINES[:2], GRANULARITIES
+        ):
+            with self.subTest(
+                start_date=start_date, exercise=exercise, workout_name=workout_name, granularity=granularity
+            ):
+                sepump = self.filtered(start_date, end_date)
+                self.assert_buckets(
+                    sepump.select_buckets(exercise, workout_name, granularity),
+                    self.expected_buckets(sepump, exercise, workout_name, granularity)
+                )
+
+    def test_summarize_buckets(self):
+        for (start_date, end_date), exercise, workout_name in itertools.product(
+            DATE_RANGES, [None] + EXERCISES[:2], [None] + ROUTINES[:2]
+        ):
+            with self.subTest(start_date=start_date, exercise=exercise, workout_name=workout_name):
+                sepump = self.filtered(start_date, end_date)
+                expected = self.expected_buckets(sepump, exercise, workout_name, "day")
+                summary = sepump.summarize_buckets(exercise, workout_name)
+                self.assertEqual(summary["workouts"], expected["workouts"].sum())
+                self.assertEqual(summary["sets"], expected["sets"].sum())
+                self.assertAlmostEqual(summary["reps"], expected["reps"].sum(), places=3)
+                self.assertAlmostEqual(summary["volume"], expected["volume"].sum(), places=1)
+                self.assertAlmostEqual(summary["minutes"], expected["duration"].sum(), places=3)
+
+    def test_filtered_data_per_granularity(self):
+        start_date, end_date = DATE_RANGES[1]
+        sepump = self.filtered(start_date, end_date)
+        days = (sepump.data.index[-1] - sepump.data.index[0]).days + 1
+        # the finest granularity with at most max_buckets buckets is chosen
+        for max_buckets, granularity in [(days, "day"), (days - 1, "week"), (1, "month")]:
+            with self.subTest(granularity=granularity):
+                sepump.update_filtered_data(EXERCISES[0], None, max_buckets)
+                self.assertEqual(sepump.filtered_granularity, granularity)
+                expected = self.expected_buckets(sepump, EXERCISES[0], None, granularity)
+                self.assertEqual(list(sepump.filtered_data_agg["date"]), list(expected["date"]))
+                np.testing.assert_allclose(sepump.filtered_data_agg["total_volume"], expected["volume"], rtol=1e-5)
+                np.testing.assert_allclose(sepump.filtered_data_agg["total_reps"], expected["reps"], rtol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
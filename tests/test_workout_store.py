@@ -0,0 +1,128 @@
+"""Compares incremental updates of the workout store with rebuilding from the
+whole export."""
+import os
+import shutil
+import tempfile
+import unittest
+from typing import Dict
+
+import pandas as pd
+
+from sepump import GRANULARITIES, SePump
+from tests.exports import hevy_export, to_csv, upload, workout_ids
+from workout_store import ALIAS_SUFFIX, WorkoutStore
+
+
+def canonical_tables(sepump: SePump) -> Dict[str, pd.DataFrame]:
+    """Returns the cleaned data and aggregate tables in a form independent of
+    row order, workout ids and categories."""
+    tables = {
+        "data": sepump.data,
+        "exercise_sessions": sepump.exercise_sessions,
+        "workout_rollup": sepump.workout_rollup,
+        "pair_rollup": sepump.pair_rollup,
+        "records": sepump.records,
+        **{f"time_cube_{granularity}": sepump.time_cube[granularity] for granularity in GRANULARITIES}
+    }
+    canonical = {}
+    for name, table in tables.items():
+        table = table.drop(columns="workout_uid", errors="ignore").reset_index(drop=True)
+        table = table.astype({
+            column: str for column, dtype in table.dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype) or column == sepump.columns["NOTES"] or column == "notes"
+        })
+        canonical[name] = table.sort_values(list(table.columns)).reset_index(drop=True)
+    return canonical
+
+
+def newest_first(rows: pd.DataFrame) -> pd.DataFrame:
+    """Orders the workouts of an export newest first, keeping the order of
+    their sets."""
+    ids = workout_ids(rows)
+    order = {workout: position for position, workout in enumerate(pd.unique(ids)[::-1])}
+    return rows.iloc[ids.map(order).argsort(kind="stable")]
+
+
+class WorkoutStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        # small chunks, so that exports span several of them
+        self.store = WorkoutStore(self.store_dir, chunksize=50)
+        self.rows = hevy_export(60)
+        self.workouts = pd.unique(workout_ids(self.rows))
+
+    def tearDown(self):
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+
+    def assert_rebuilt(self, sepump: SePump, content: bytes) -> None:
+        """Asserts that the store's result equals cleaning and aggregating the
+        export from scratch."""
+        rebuilt = SePump()
+        rebuilt.stream_data(upload(content))
+        rebuilt.build_aggregates()
+        expected, actual = canonical_tables(rebuilt), canonical_tables(sepump)
+        for name in expected:
+            pd.testing.assert_frame_equal(actual[name], expected[name], check_dtype=False, obj=name)
+        # every workout keeps a single id, shared by its rows and its rollup
+        ids = sepump.data.groupby("workout_uid", observed=True)[sepump.columns["WORKOUT_NAME"]].nunique()
+        self.assertTrue((ids == 1).all())
+        self.assertEqual(len(ids), rebuilt.data["workout_uid"].nunique())
+        self.assertEqual(set(sepump.workout_rollup["workout_uid"]), set(sepump.data["workout_uid"]))
+        self.assertTrue(sepump.data.index.is_monotonic_increasing)
+
+    def update(self, rows: pd.DataFrame) -> None:
+        content = to_csv(rows)
+        self.assert_rebuilt(self.store.update(upload(content)), content)
+
+    def rows_of(self, workouts) -> pd.DataFrame:
+        return self.rows[workout_ids(self.rows).isin(workouts)]
+
+    def test_appended_rows(self):
+        self.update(self.rows_of(self.workouts[:40]))
+        self.update(self.rows)
+
+    def test_rows_inserted_after_header(self):
+        self.update(newest_first(self.rows_of(self.workouts[:40])))
+        self.update(newest_first(self.rows))
+
+    def test_rows_appended_to_known_workout(self):
+        known = self.rows_of(self.workouts[:40])
+        self.update(known)
+        extra = known.iloc[[-1]].assign(set_index="9", reps="3")
+        self.update(pd.concat([known, extra]))
+
+    def test_edited_row(self):
+        self.update(self.rows)
+        edited = self.rows.copy()
+        edited.loc[workout_ids(edited) == self.workouts[10], "weight_kg"] = "150"
+        self.update(edited)
+
+    def test_duplicate_rows(self):
+        self.update(self.rows)
+        self.update(pd.concat([self.rows, self.rows.iloc[[5, 6]], self.rows.iloc[[-1]]]))
+        self.update(pd.concat([self.rows.iloc[:100], self.rows.iloc[[3]], self.rows.iloc[100:]]))
+
+    def test_removed_workouts(self):
+        self.update(self.rows)
+        self.update(self.rows_of(self.workouts[1:]))
+        self.update(self.rows_of(self.workouts[1:30]))
+
+    def test_removed_oldest_workout_moves_store(self):
+        self.update(self.rows)
+        self.update(self.rows_of(self.workouts[1:]))
+        # the store moved to the key of the new oldest workout
+        stores = [name for name in os.listdir(self.store_dir) if not name.endswith(ALIAS_SUFFIX)]
+        self.assertEqual(len(stores), 1)
+        # a new instance reads the store from disk
+        self.store = WorkoutStore(self.store_dir, chunksize=50)
+        self.update(self.rows)
+
+    def test_unchanged_export(self):
+        self.update(self.rows)
+        self.update(self.rows)
+        self.store = WorkoutStore(self.store_dir)
+        self.update(self.rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
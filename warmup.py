@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class Warmup:
+    """Per session precomputation of values in a thread pool.
+
+    A run computes values for a source (e.g. the date filtered SePump) in the
+    background. Values are only served for the source of the current run, so
+    starting a run for a new source cancels the previous run and makes its
+    results unreachable.
+    """
+
+    def __init__(self, executor: Executor):
+        """Initializes an idle warm-up.
+
+        Args:
+            executor (Executor): Pool the values are computed in, usually
+                shared by all sessions.
+        """
+        self.executor = executor
+        self.source = None
+        self.futures: Dict[Hashable, Future] = {}
+        self.lock = threading.Lock()
+
+    def start(self, source: Any, tasks: Dict[Hashable, Callable[[], Any]]) -> None:
+        """Cancels the current run and starts computing values for source.
+
+        Args:
+            source (Any): Object the values are derived from, compared by
+                identity.
+            tasks (Dict[Hashable, Callable[[], Any]]): Computation per key,
+                submitted in the given order.
+        """
+        self.cancel()
+        with self.lock:
+            self.source = source
+            self.futures = {key: self.executor.submit(task) for key, task in tasks.items()}
+
+    def cancel(self) -> None:
+        """Cancels all computations that have not started yet and forgets the
+        results of the current run."""
+        with self.lock:
+            for future in self.futures.values():
+                future.cancel()
+            self.source = None
+            self.futures = {}
+
+    def get(self, source: Any, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Returns a precomputed value, computing it directly if it is not
+            available.
+
+        Waits for a value that is being computed instead of computing it
+        twice. A value that has not started yet is taken out of the queue.
+
+        Args:
+            source (Any): Object the value is derived from.
+            key (Hashable): Key of the value.
+            compute (Callable[[], Any]): Computes the value directly.
+
+        Returns:
+            Any: Value for key.
+        """
+        with self.lock:
+            future: Optional[Future] = self.futures.get(key) if source is self.source else None
+        if future is None or future.cancel():
+            return compute()
+        try:
+            return future.result()
+        except Exception:
+            # errors are raised by the direct computation
+            return compute()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of values of the current run per state.
+
+        Returns:
+            Dict[str, int]: {"done": ..., "pending": ...}
+        """
+        with self.lock:
+            done = sum(future.done() for future in self.futures.values())
+            return {"done": done, "pending": len(self.futures) - done}
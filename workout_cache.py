@@ -0,0 +1,123 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from os.path import join
+from typing import Optional
+
+import pyarrow as pa
+
+from arrow_tables import read_table, write_table
+from sepump import PERSISTED_TABLES, SePump
+from settings import CACHE_DIR, CACHE_SIZE_BUDGET
+
+# Bump whenever the output of SePump.clean_data or of the aggregate tables
+# changes, so that stale entries are no longer hit.
+CACHE_VERSION = b"6"
+# Every entry is a directory holding one Arrow IPC file per table.
+CACHE_SUFFIX = ".entry"
+TABLE_SUFFIX = ".arrow"
+
+
+class WorkoutCache:
+    """Disk cache of cleaned workout data and aggregate tables, keyed by a 
+    hash of the uploaded csv.
+
+    Entries are shared by all server processes using the same cache 
+    directory: a csv is only cleaned and aggregated by the first process 
+    receiving it, every other process maps the stored tables into memory.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, size_budget: int = CACHE_SIZE_BUDGET):
+        """Initializes the cache directory.
+
+        Args:
+            cache_dir (str): Directory the cache entries are stored in.
+            size_budget (int): Maximum total size of all entries in bytes.
+                Least recently used entries are evicted beyond that.
+        """
+        self.cache_dir = cache_dir
+        self.size_budget = size_budget
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(content: bytes) -> str:
+        """Computes the cache key of an uploaded csv.
+
+        Args:
+            content (bytes): Raw content of the csv file.
+
+        Returns:
+            str: Hex digest identifying the content.
+        """
+        return hashlib.sha256(CACHE_VERSION + b"\0" + content).hexdigest()
+
+    def get(self, key: str) -> Optional[SePump]:
+        """Loads cleaned workout data and aggregate tables from the cache.
+
+        The tables are memory mapped, so that all processes serving the same
+        data share it through the OS page cache, see arrow_tables.read_table.
+
+        Args:
+            key (str): Cache key of the uploaded csv.
+
+        Returns:
+            Optional[SePump]: SePump with cleaned data, aggregate tables and 
+            column names, or None if the key is not cached.
+        """
+        path = self.__path(key)
+        try:
+            tables = {name: read_table(join(path, name + TABLE_SUFFIX)) for name in PERSISTED_TABLES}
+        except (OSError, KeyError, ValueError, pa.ArrowException):
+            return None
+        # refresh the entry's position in the LRU order
+        os.utime(path)
+        metadata = tables["data"][1]
+        sepump = SePump()
+        sepump.columns = metadata["columns"]
+        sepump.dialect = metadata["dialect"]
+        sepump.import_tables({name: table for name, (table, _) in tables.items()})
+        return sepump
+
+    def put(self, key: str, sepump: SePump) -> None:
+        """Stores cleaned workout data and aggregate tables in the cache and
+            evicts old entries.
+
+        Args:
+            key (str): Cache key of the uploaded csv.
+            sepump (SePump): SePump with cleaned data, aggregate tables and 
+                column names, before any date range is applied.
+        """
+        # write to a temporary directory first, so that concurrent readers 
+        # never see a partially written entry
+        tmp_path = tempfile.mkdtemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            metadata = {"columns": sepump.columns, "dialect": sepump.dialect}
+            for name, table in sepump.export_tables().items():
+                write_table(join(tmp_path, name + TABLE_SUFFIX), table, metadata if name == "data" else {})
+            try:
+                os.rename(tmp_path, self.__path(key))
+            except OSError:
+                # another process stored the same data meanwhile
+                pass
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        """Removes least recently used entries until the size budget is met."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(CACHE_SUFFIX) and entry.is_dir():
+                size = sum(table.stat().st_size for table in os.scandir(entry.path))
+                entries.append((entry.stat().st_mtime, size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.size_budget:
+                break
+            # processes that mapped the entry keep reading it until they let go
+            shutil.rmtree(path, ignore_errors=True)
+            total_size -= size
+
+    def __path(self, key: str) -> str:
+        return join(self.cache_dir, key + CACHE_SUFFIX)
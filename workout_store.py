@@ -0,0 +1,354 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import uuid
+from os.path import join
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from arrow_tables import read_table, write_table
+from instrumentation import profiled
+from sepump import COLUMN_DEFINITIONS_PATH, PERSISTED_TABLES, WORKOUT_KEY, CsvSource, SePump
+from settings import INGEST_CHUNK_SIZE, STORE_DIR, STORE_SIZE_BUDGET
+
+# Bump whenever the output of SePump.clean_data or of the aggregate tables
+# changes, so that stale stores are rebuilt.
+STORE_VERSION = b"6"
+# Tables persisted per user.
+TABLES = PERSISTED_TABLES + ("workouts",)
+# Number of oldest workouts a store can be found by. A store is kept under 
+# the key of the oldest workout, the others point to it by alias files, so 
+# that the store is still found after the oldest workouts were removed from
+# or older workouts were added to the export.
+KEYED_WORKOUTS = 3
+ALIAS_SUFFIX = ".alias"
+
+
+class WorkoutStore:
+    """Disk store of cleaned workout data and aggregate tables per user.
+
+    Exports always contain the full workout history. Along with the cleaned
+    history of a user, the store keeps a content hash per workout, so that a
+    re-upload only cleans and aggregates the workouts that were added or
+    edited since the last upload.
+    """
+
+    def __init__(
+        self,
+        store_dir: str = STORE_DIR,
+        chunksize: int = INGEST_CHUNK_SIZE,
+        size_budget: int = STORE_SIZE_BUDGET
+    ):
+        """Initializes the store directory.
+
+        Args:
+            store_dir (str): Directory the stores of all users are kept in.
+            chunksize (int): Number of csv rows read at once.
+            size_budget (int): Maximum total size of all stores in bytes.
+                Least recently used stores are evicted beyond that.
+        """
+        self.store_dir = store_dir
+        self.chunksize = chunksize
+        self.size_budget = size_budget
+        os.makedirs(store_dir, exist_ok=True)
+
+    @staticmethod
+    def user_key(dialect: str, workouts: pd.DataFrame) -> Optional[str]:
+        """Identifies the user of an export by its oldest workout.
+
+        Args:
+            dialect (str): Format of the export.
+            workouts (pd.DataFrame): Result of SePump.peek_workouts.
+
+        Returns:
+            Optional[str]: Hex digest identifying the user, None if no workout
+            was found.
+        """
+        keys = WorkoutStore.user_keys(dialect, workouts, 1)
+        return keys[0] if keys else None
+
+    @staticmethod
+    def user_keys(dialect: str, workouts: pd.DataFrame, count: int = KEYED_WORKOUTS) -> List[str]:
+        """Computes the keys of the oldest workouts of an export, the first
+            being its user_key.
+
+        Args:
+            dialect (str): Format of the export.
+            workouts (pd.DataFrame): Result of SePump.peek_workouts.
+            count (int): Number of oldest workouts.
+
+        Returns:
+            List[str]: Hex digests, oldest workout first.
+        """
+        oldest = workouts.sort_values(by=["start", WORKOUT_KEY]).iloc[:count]
+        return [
+            hashlib.sha256(b"\0".join([STORE_VERSION, dialect.encode(), str(key).encode()])).hexdigest()
+            for key in oldest[WORKOUT_KEY]
+        ]
+
+    @profiled()
+    def update(self, csv: CsvSource, column_definitions_path: str = COLUMN_DEFINITIONS_PATH) -> SePump:
+        """Merges an uploaded export into the store of its user.
+
+        An export identical to the previously stored one is not read at all.
+        If it only adds rows to the end of the previously stored export, or
+        right after its header, only these rows are read, with the date 
+        format of the stored export.
+        Otherwise the csv is read once, skipping the cleaning of all stored
+        workouts. Workouts are then compared by their keys and content hashes:
+        added workouts are merged into the stored data, workouts missing from
+        the export are removed, and only the days of these workouts are
+        aggregated again. Edited workouts are removed and added again, which
+        requires a second pass over the csv. A new user's export is cleaned
+        as a whole.
+
+        The store is found by any of the KEYED_WORKOUTS oldest workouts of 
+        the export. If its oldest workout changed, the store is moved to the
+        new user_key. Least recently used stores are evicted beyond the size
+        budget.
+
+        Args:
+            csv (CsvSource): Path to or uploaded csv file.
+            column_definitions_path (str): Path to json file with column name
+            definitions.
+
+        Raises:
+            Exception: Raised if the csv is not supported.
+
+        Returns:
+            SePump: SePump with the cleaned data and aggregate tables of the
+            whole export.
+        """
+        if hasattr(csv, "getvalue"):
+            content = csv.getvalue()
+        else:
+            with open(csv, "rb") as f:
+                content = f.read()
+        probe = SePump()
+        peeked = probe.peek_workouts(io.BytesIO(content), column_definitions_path)
+        keys = self.user_keys(probe.dialect, peeked)
+        user_key = keys[0] if keys else None
+        stored_key = self.find(keys)
+        sepump, known, upload = self.load(stored_key) if stored_key is not None else (None, None, None)
+        digest = hashlib.sha256(content).hexdigest()
+        if sepump is not None and upload["digest"] == digest:
+            return sepump
+        if known is None:
+            known = pd.DataFrame({
+                WORKOUT_KEY: np.empty(0, dtype=np.uint64),
+                "content_hash": np.empty(0, dtype=np.uint64),
+                "workout_uid": np.empty(0, dtype=np.int32)
+            })
+        known_keys = known[WORKOUT_KEY].to_numpy()
+
+        new = SePump()
+        extension = self.__extension(content, upload) if sepump is not None else None
+        if extension is not None:
+            new.stream_data(
+                io.BytesIO(extension), column_definitions_path, self.chunksize, known_workouts=known_keys,
+                date_format=upload["date_format"]
+            )
+            # rows added to a stored workout edit it, which needs all its rows
+            if new.workout_hashes[WORKOUT_KEY].isin(known_keys).any():
+                extension = None
+        if extension is not None:
+            added, removed = new.workout_hashes, known.iloc[:0]
+        else:
+            new.stream_data(io.BytesIO(content), column_definitions_path, self.chunksize, known_workouts=known_keys)
+            # an edited workout is removed with its old and added with its new hash
+            matched = new.workout_hashes.merge(known, on=[WORKOUT_KEY, "content_hash"], how="outer", indicator=True)
+            added = matched[matched["_merge"] == "left_only"].drop(columns=["_merge", "workout_uid"])
+            removed = matched[matched["_merge"] == "right_only"]
+            if sepump is not None and len(added) == 0 and len(removed) == 0:
+                return sepump
+            if added[WORKOUT_KEY].isin(known_keys).any():
+                new.stream_data(
+                    io.BytesIO(content), column_definitions_path, self.chunksize,
+                    known_workouts=np.setdiff1d(new.workout_hashes[WORKOUT_KEY].to_numpy(), added[WORKOUT_KEY].to_numpy())
+                )
+
+        if sepump is not None and len(sepump.data):
+            new.data["workout_uid"] += sepump.data["workout_uid"].max() + 1
+        # workouts without any sets left after cleaning are kept with the id -1
+        uids = new.data[[WORKOUT_KEY, "workout_uid"]].drop_duplicates(WORKOUT_KEY)
+        added = added.merge(uids, on=WORKOUT_KEY, how="left")
+        added["workout_uid"] = added["workout_uid"].fillna(-1).astype(np.int32)
+        new.data = new.data.drop(columns=WORKOUT_KEY)
+
+        if sepump is None:
+            sepump = new
+            sepump.build_aggregates()
+        else:
+            removed_uids = removed["workout_uid"].to_numpy()
+            sepump.merge_workouts(new.data, removed_uids[removed_uids >= 0])
+        known = pd.concat([known[~known[WORKOUT_KEY].isin(removed[WORKOUT_KEY])], added], ignore_index=True)
+        if user_key is not None:
+            upload = {
+                "size": len(content),
+                "header_size": content.find(b"\n") + 1,
+                "digest": digest,
+                "date_format": new.date_format
+            }
+            self.save(user_key, sepump, known, upload, keys[1:])
+            if stored_key is not None and stored_key != user_key:
+                self.remove(stored_key)
+            self.evict()
+        return sepump
+
+    def __extension(self, content: bytes, upload: Dict) -> Optional[bytes]:
+        """Extracts the rows an export adds to the previously stored export.
+
+        Args:
+            content (bytes): Raw content of the export.
+            upload (Dict): Size, header size, digest and date format of the
+            stored export.
+
+        Returns:
+            Optional[bytes]: Header followed by the added rows, None if the
+            export does not start or end with the stored export.
+        """
+        size, header_size = upload["size"], upload["header_size"]
+        if len(content) <= size or header_size <= 0:
+            return None
+        content = memoryview(content)
+        # rows appended at the end, as in exports sorted oldest first
+        if hashlib.sha256(content[:size]).hexdigest() == upload["digest"]:
+            return bytes(content[:header_size]) + bytes(content[size:])
+        # rows inserted after the header, as in exports sorted newest first
+        inserted_end = len(content) - size + header_size
+        digest = hashlib.sha256(content[:header_size])
+        digest.update(content[inserted_end:])
+        if digest.hexdigest() == upload["digest"]:
+            return bytes(content[:inserted_end])
+        return None
+
+    def load(self, user_key: str) -> Tuple[Optional[SePump], Optional[pd.DataFrame], Optional[Dict]]:
+        """Loads the store of a user, memory mapping its tables (see 
+            arrow_tables.read_table).
+
+        Args:
+            user_key (str): Key of the user.
+
+        Returns:
+            Tuple[Optional[SePump], Optional[pd.DataFrame], Optional[Dict]]:
+            (SePump with cleaned data and aggregate tables, Known workouts
+            with their keys, content hashes and ids, Size, header size, 
+            digest and date format of the stored export), all None if 
+            nothing or an incompletely written store is stored.
+        """
+        try:
+            tables = {name: read_table(self.__path(user_key, name)) for name in TABLES}
+        except (OSError, KeyError, ValueError, pa.ArrowException):
+            return None, None, None
+        metadata = {name: entry for name, (_, entry) in tables.items()}
+        # tables are replaced one by one, so a concurrent or interrupted save
+        # can leave tables of different generations behind
+        if len({entry["generation"] for entry in metadata.values()}) != 1:
+            return None, None, None
+        # refresh the store's position in the LRU order
+        os.utime(join(self.store_dir, user_key))
+
+        sepump = SePump()
+        sepump.columns = metadata["data"]["columns"]
+        sepump.dialect = metadata["data"]["dialect"]
+        sepump.import_tables({name: tables[name][0] for name in PERSISTED_TABLES})
+        return sepump, tables["workouts"][0], metadata["data"]["upload"]
+
+    def find(self, keys: List[str]) -> Optional[str]:
+        """Looks up the store of a user by the keys of its oldest workouts.
+
+        Args:
+            keys (List[str]): Result of user_keys.
+
+        Returns:
+            Optional[str]: Key the store is kept under, None if none of the
+            keys names a store or an alias of a store.
+        """
+        for key in keys:
+            if os.path.isdir(join(self.store_dir, key)):
+                return key
+            try:
+                with open(join(self.store_dir, key + ALIAS_SUFFIX), encoding="utf8") as f:
+                    target = f.read()
+            except OSError:
+                continue
+            if os.path.isdir(join(self.store_dir, target)):
+                return target
+        return None
+
+    def save(
+        self,
+        user_key: str,
+        sepump: SePump,
+        workouts: pd.DataFrame,
+        upload: Dict,
+        aliases: Optional[List[str]] = None
+    ) -> None:
+        """Stores the cleaned data and aggregate tables of a user.
+
+        Args:
+            user_key (str): Key of the user.
+            sepump (SePump): SePump with cleaned data and aggregate tables,
+            before any date range is applied.
+            workouts (pd.DataFrame): Known workouts with their keys, content
+            hashes and ids.
+            upload (Dict): Size, header size, digest and date format of the
+            export.
+            aliases (List[str]): Further keys the store is found by, see 
+            user_keys.
+        """
+        os.makedirs(join(self.store_dir, user_key), exist_ok=True)
+        generation = uuid.uuid4().hex
+        frames = {**sepump.export_tables(), "workouts": workouts}
+        for name in TABLES:
+            metadata = {"generation": generation}
+            if name == "data":
+                metadata.update(columns=sepump.columns, dialect=sepump.dialect, upload=upload)
+            write_table(self.__path(user_key, name), frames[name], metadata)
+        for alias in aliases or []:
+            fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf8") as f:
+                f.write(user_key)
+            os.replace(tmp_path, join(self.store_dir, alias + ALIAS_SUFFIX))
+
+    def remove(self, user_key: str) -> None:
+        """Deletes the store of a user, e.g. after it moved to a new key.
+
+        Args:
+            user_key (str): Key of the user.
+        """
+        # processes that mapped the store keep reading it until they let go
+        shutil.rmtree(join(self.store_dir, user_key), ignore_errors=True)
+
+    def evict(self) -> None:
+        """Removes least recently used stores until the size budget is met,
+            along with aliases of removed stores."""
+        stores, aliases = [], []
+        for entry in os.scandir(self.store_dir):
+            if entry.name.endswith(ALIAS_SUFFIX):
+                aliases.append(entry.path)
+            elif entry.is_dir():
+                size = sum(table.stat().st_size for table in os.scandir(entry.path))
+                stores.append((entry.stat().st_mtime, size, entry.path))
+        total_size = sum(size for _, size, _ in stores)
+        for _, size, path in sorted(stores):
+            if total_size <= self.size_budget:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total_size -= size
+        for path in aliases:
+            try:
+                with open(path, encoding="utf8") as f:
+                    if not os.path.isdir(join(self.store_dir, f.read())):
+                        os.remove(path)
+            except OSError:
+                # removed by another process meanwhile
+                pass
+
+    def __path(self, user_key: str, name: str) -> str:
+        return join(self.store_dir, user_key, name + ".feather")